@@ -0,0 +1,59 @@
+import io
+import sys
+import time
+import argparse
+from pathlib import Path
+from lxml import etree
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rosstat.flc import parse_report  # noqa: E402
+from rosstat.export import export_reports  # noqa: E402
+from workload import WORKLOADS, generate_report  # noqa: E402
+
+
+def reparse_cells(source):
+    '''Ячейки отчёта повторным разбором XML, как при выгрузке своим кодом'''
+    cells = []
+    xml = etree.parse(io.BytesIO(source))
+    for section in xml.xpath('/report/sections/section'):
+        for row in section.xpath('./row'):
+            for col in row.xpath('./col'):
+                cells.append((section.attrib['code'], row.attrib['code'],
+                              row.get('s1'), row.get('s2'), row.get('s3'),
+                              col.attrib['code'], col.text))
+    return cells
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замер выгрузки ячеек '
+                                                 'отчётов по колонкам')
+    parser.add_argument('workload', nargs='?', default='medium',
+                        choices=sorted(WORKLOADS))
+    parser.add_argument('--reports', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    sources = [generate_report(**WORKLOADS[args.workload], seed=seed)
+               for seed in range(args.reports)]
+    reports = [parse_report(source) for source in sources]
+
+    start = time.perf_counter()
+    cells = sum(len(reparse_cells(source)) for source in sources)
+    reparse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data = export_reports(reports)
+    export = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data.to_csv(io.StringIO())
+    csv = time.perf_counter() - start
+
+    print(f'{args.reports} reports, {len(data)} cells ({cells} in XML): '
+          f'XML reparse {reparse:.3f}s, export {export:.3f}s, '
+          f'csv {csv:.3f}s')
+    return 0 if cells == len(data) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
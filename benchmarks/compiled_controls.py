@@ -0,0 +1,155 @@
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rosstat.flc import parse_schema, parse_report  # noqa: E402
+from rosstat.validators.control.inspectors.formula import ControlParams  # noqa
+from rosstat.validators.control.parser import (get_parser,  # noqa: E402
+                                               get_program)
+from rosstat.validators.control.parser.compiler import Compiler  # noqa: E402
+from workload import WORKLOADS, generate_formulas, generate_schema  # noqa
+from workload import generate_report  # noqa: E402
+from formula_parser import random_formulas, structured_formulas  # noqa
+
+
+COORDS = ('{[1][101][3]}', '{[1][101-105][3,4]}', '{[2][*][3]}',
+          '{[1][*][*]}', '{[2][102][*]}', '{[1][101,103][5]}',
+          '{[1][*][4][00.00.01-00.00.90]}', '{[2][101][3][00.00.05]}',
+          '{[9][101][3]}', '{[1,9][*][3]}', '{{[1][101][3]}}',
+          '{{[1][*][4][00.00.01-00.00.90]}}')
+
+
+def _random_expr(rnd, depth):
+    '''Случайное выражение из конструкций грамматики формул'''
+    kind = rnd.randrange(10 if depth > 0 else 2)
+    if kind == 0:
+        return rnd.choice(COORDS)
+    elif kind == 1:
+        return rnd.choice(('0', '1', '2.5', '100'))
+
+    expr = _random_expr(rnd, depth - 1)
+    if kind == 2:
+        return rnd.choice(('sum', 'abs', 'floor', '-')) + expr
+    elif kind == 3:
+        return f'sum({expr})'
+    elif kind == 4:
+        return f'{expr}{rnd.choice("+-*/")}{_random_expr(rnd, depth - 1)}'
+    elif kind == 5:
+        return f'isnull({expr}, {rnd.choice("01")})'
+    elif kind == 6:
+        return f'round({expr}, {rnd.choice(("0", "1", "2, 1"))})'
+    elif kind in (7, 8):
+        action = rnd.choice(('coalesce', 'nullif'))
+        return f'{action}({expr}, {_random_expr(rnd, depth - 1)})'
+    return f'({expr})'
+
+
+def random_comparisons(count, seed=0):
+    '''Случайные сравнения случайных выражений, в т.ч. объединённые "or"'''
+    rnd = random.Random(seed)
+    formulas = []
+    for _ in range(count):
+        formula = (_random_expr(rnd, 3)
+                   + rnd.choice(('|=|', '|>=|', '<', '|<>|'))
+                   + _random_expr(rnd, 3))
+        if formulas and rnd.random() < 0.2:
+            formula = f'({formula})|or|({formulas[-1]})'
+        formulas.append(formula)
+    return formulas
+
+
+def _outcome(evaluate, report, params):
+    '''Непройденные проверки формулы, либо тип исключения'''
+    try:
+        results = evaluate(report, params)
+        return [repr(control) for elem in results for control in elem.controls]
+    except Exception as ex:
+        return type(ex).__name__
+
+
+def _interpret(formula):
+    evaluator = get_parser().parse(formula)
+    return lambda report, params: evaluator.check(report, params)
+
+
+def _compile(formula):
+    evaluator = get_parser().parse(formula)
+    return Compiler().compile(evaluator)
+
+
+def cross_check(formulas, report, params):
+    '''Сверка результатов проверки деревом элементов и скомпилированной
+       функцией. Скомпилированные функции используют общие для всех формул
+       выборки ячеек. Формулы, которые не удалось разобрать, пропускаются
+    '''
+    shared = params._replace(selections={})
+    checked, mismatches = 0, []
+    for formula in formulas:
+        try:
+            if get_parser().parse(formula) is None:
+                continue
+        except Exception:
+            continue
+        checked += 1
+        if (_outcome(_interpret(formula), report, params)
+                != _outcome(_compile(formula), report, shared)):
+            mismatches.append(formula)
+    for formula in mismatches[:10]:
+        print('MISMATCH', repr(formula))
+    return checked, mismatches
+
+
+def _time(formulas, report, params, compiled):
+    '''Время проверки формул. Дерево элементов одноразовое, поэтому
+       формулы разбираются при каждой проверке, как до компиляции
+    '''
+    start = time.perf_counter()
+    for formula in formulas:
+        if compiled:
+            evaluate = get_program(formula)
+        else:
+            evaluate = _interpret(formula)
+        _outcome(evaluate, report, params)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Сверка и замер проверки '
+                                                 'контролей деревом элементов '
+                                                 'и скомпилированными '
+                                                 'функциями')
+    parser.add_argument('workload', nargs='?', default='small',
+                        choices=sorted(WORKLOADS))
+    parser.add_argument('--random', type=int, default=5000,
+                        help='кол-во случайных формул для сверки')
+    args = parser.parse_args(argv)
+
+    params = WORKLOADS[args.workload]
+    schema = parse_schema(generate_schema(**params))
+    report = parse_report(generate_report(**params))
+    control_params = ControlParams(True, schema.formats, schema.catalogs,
+                                   schema.dimension, 2, 0.0, previous=report)
+
+    formulas = generate_formulas(params['controls'], params['sections'],
+                                 params['rows'], params['columns'],
+                                 params['terms'])
+    corpus = (formulas + structured_formulas() + random_formulas(args.random)
+              + random_comparisons(args.random))
+    checked, mismatches = cross_check(corpus, report, control_params)
+
+    interpreted = _time(formulas, report, control_params, compiled=False)
+    compiled = _time(formulas, report, control_params._replace(selections={}),
+                     compiled=True)
+
+    print(f'cross-check: {checked} formulas, {len(mismatches)} mismatches')
+    print(f'{len(formulas)} controls: tree {interpreted:.3f}s, '
+          f'compiled {compiled:.3f}s')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
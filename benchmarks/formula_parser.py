@@ -0,0 +1,121 @@
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rosstat.flc import parse_schema  # noqa: E402
+from rosstat.validators.control.parser import (get_parser,  # noqa: E402
+                                               set_frontend)
+from workload import WORKLOADS, generate_formulas, generate_schema  # noqa
+
+FRAGMENTS = ('{[1][101][3]}', '{[1][101-105][3,4]}', '{[2][*][3][01.01]}',
+             '{[1][101][3][*][02]}', '{{[1][102][4]}}', '{', '}', '1', '2.5',
+             '0', '+', '-', '*', '/', '|>=|', '|=|', '|<>|', '<', 'and', 'or',
+             'sum', 'abs', 'floor', 'isnull', 'round', 'coalesce', 'nullif',
+             '(', ')', ',', ' ')
+
+
+def dump_tree(obj):
+    '''Структура дерева элементов для сравнения'''
+    if isinstance(obj, (list, tuple)):
+        return [dump_tree(item) for item in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted(repr(dump_tree(item)) for item in obj)
+    if isinstance(obj, dict):
+        return {key: dump_tree(value) for key, value in obj.items()}
+    if hasattr(obj, '__dict__') and not callable(obj):
+        return (type(obj).__name__, dump_tree(vars(obj)))
+    return repr(obj)
+
+
+def _parse(frontend, formula):
+    '''Дерево формулы, либо тип исключения'''
+    try:
+        return dump_tree(get_parser(frontend).parse(formula))
+    except Exception as ex:
+        return type(ex).__name__
+
+
+def random_formulas(count, seed=0):
+    '''Случайные последовательности фрагментов формул, в т.ч. ошибочные'''
+    rnd = random.Random(seed)
+    return [''.join(rnd.choice(FRAGMENTS) for _ in range(rnd.randint(1, 12)))
+            for _ in range(count)]
+
+
+def structured_formulas():
+    '''Формулы со всеми конструкциями грамматики'''
+    a, b, c = '{[1][101][3]}', '{[1][102][3]}', '{[1][103-105][4]}'
+    return [
+        f'{a}|=|{b}', f'{a}+{b}*2-{c}/4|>|0|and|{a}|<|1|or|{b}|=|0',
+        f'sum{a}|>=|sum({b}+1)', f'abs -{a}+1|<=|floor{b}',
+        f'isnull({a},0)+1|=|round({b}, 2, 1)', f'isnull {a}+1, 0|=|1',
+        f'round isnull {a}, 0, 2|=|1', f'coalesce({a}, {b}, 0)|=|{c}',
+        f'nullif ({a}), {b}|>|0', f'isnull(({a}, {b}), {c})|=|0',
+        f'isnull(({a})+1, 2)|=|0', f'-isnull {a} > 0, 1|=|0',
+        f'sum isnull {a}, {b}*2|=|0', f'1 + coalesce({a}, 0) * 2|=|3',
+        f'({a}|=|1)|or|({b}|=|2)', f'{{[1][101][3][01.01-01.05]}}|=|1',
+        f'{{{a}}}|=|{a}', f'sum{{{c}}}+1|>=|sum {c}', f'{{{a}|=|1',
+    ]
+
+
+def cross_check(formulas):
+    mismatches = [formula for formula in formulas
+                  if _parse('ply', formula) != _parse('pratt', formula)]
+    for formula in mismatches[:10]:
+        print('MISMATCH', repr(formula))
+    return mismatches
+
+
+def _time_parse(frontend, formulas):
+    parser = get_parser(frontend)
+    start = time.perf_counter()
+    for formula in formulas:
+        parser.parse(formula)
+    return time.perf_counter() - start
+
+
+def _time_load(frontend, schema_xml):
+    set_frontend(frontend)
+    try:
+        start = time.perf_counter()
+        parse_schema(schema_xml)
+        return time.perf_counter() - start
+    finally:
+        set_frontend('ply')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Сверка и замер парсеров '
+                                                 'формул контролей')
+    parser.add_argument('workload', nargs='?', default='medium',
+                        choices=sorted(WORKLOADS))
+    parser.add_argument('--random', type=int, default=20000,
+                        help='кол-во случайных формул для сверки')
+    args = parser.parse_args(argv)
+
+    params = WORKLOADS[args.workload]
+    formulas = generate_formulas(params['controls'], params['sections'],
+                                 params['rows'], params['columns'],
+                                 params['terms'])
+    corpus = formulas + structured_formulas() + random_formulas(args.random)
+    mismatches = cross_check(corpus)
+
+    schema_xml = generate_schema(**params)
+    results = {frontend: (_time_parse(frontend, formulas),
+                          _time_load(frontend, schema_xml))
+               for frontend in ('ply', 'pratt')}
+
+    print(f'cross-check: {len(corpus)} formulas, '
+          f'{len(mismatches)} mismatches')
+    for frontend, (parse, load) in results.items():
+        print(f'{frontend:>6}: parse {len(formulas)} formulas {parse:.3f}s, '
+              f'schema load {load:.3f}s')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from statistics import median
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MEASURE = '''
+import time
+start = time.perf_counter()
+import rosstat.flc
+imported = time.perf_counter()
+from rosstat.validators.control.parser import get_parser
+get_parser().parse('{[1][1][3]}|=|1')
+parsed = time.perf_counter()
+print(imported - start, parsed - imported)
+'''
+
+
+def _measure():
+    '''Время импорта rosstat.flc и разбора первой формулы в новом процессе'''
+    output = subprocess.run([sys.executable, '-c', MEASURE], cwd=ROOT,
+                            check=True, capture_output=True, text=True)
+    return tuple(map(float, output.stdout.split()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замер времени импорта')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=0.25,
+                        help='допустимое время импорта в секундах')
+    args = parser.parse_args(argv)
+
+    imports, parses = zip(*(_measure() for _ in range(args.runs)))
+    results = {'import': median(imports),
+               'first_parse': median(parses),
+               'budget': args.budget}
+    print(json.dumps(results, indent=2))
+    return 0 if results['import'] <= args.budget else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import sys
+import json
+import argparse
+import resource
+import tracemalloc
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rosstat.flc import parse_schema, parse_report  # noqa: E402
+from workload import WORKLOADS, generate_schema, generate_report  # noqa: E402
+
+
+def _peak_rss():
+    '''Пиковый RSS процесса в байтах (в Linux ru_maxrss в килобайтах)'''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _measure(name):
+    '''Замер пикового потребления памяти на этапах разбора схемы, отчёта
+       и проверки. Выполняется в отдельном процессе
+    '''
+    params = WORKLOADS[name]
+    schema_xml = generate_schema(**params)
+    report_xml = generate_report(**params)
+    results = {}
+
+    tracemalloc.start()
+    schema = parse_schema(schema_xml)
+    results['parse_schema'] = _snapshot()
+
+    report = parse_report(report_xml)
+    results['parse_report'] = _snapshot()
+
+    errors = schema.validate(report)
+    results['validate'] = _snapshot()
+    tracemalloc.stop()
+
+    results['errors'] = len(errors)
+    results['schema_usage'] = schema.memory_usage()
+    results['report_usage'] = report.memory_usage()
+    return results
+
+
+def _snapshot():
+    '''Пики tracemalloc и RSS с начала замера. Пик tracemalloc сбрасывается'''
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    return {'tracemalloc_peak': peak, 'rss_peak': _peak_rss()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замер потребления памяти '
+                                                 'при разборе и проверке')
+    parser.add_argument('workloads', nargs='*', default=['small', 'medium'],
+                        choices=sorted(WORKLOADS))
+    args = parser.parse_args(argv)
+
+    ctx = multiprocessing.get_context('spawn')
+    for name in args.workloads:
+        with ctx.Pool(1) as pool:
+            results = pool.apply(_measure, (name,))
+        print(json.dumps({name: results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
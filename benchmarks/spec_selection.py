@@ -0,0 +1,58 @@
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rosstat.flc import parse_schema, parse_report  # noqa: E402
+from workload import generate_schema, generate_report, term_id  # noqa: E402
+
+
+def generate_controls(count, terms, seed=0):
+    '''Контроли, выбирающие строки раздела по одной специфике либо
+       по небольшому диапазону специфик
+    '''
+    rnd = random.Random(seed)
+    controls = []
+    for i in range(1, count + 1):
+        start = rnd.randrange(terms - 10)
+        if i % 2:
+            rule = f'{{[1][101][3][{term_id(start)}]}}|<=|500'
+        else:
+            spec = f'{term_id(start)}-{term_id(start + 10)}'
+            rule = f'SUM{{[1][101][3][{spec}]}}|<=|500'
+        controls.append('<control id="{}" name="Контроль {}" rule={} '
+                        'condition="" tip="1" fault="0" '
+                        'precision="2"/>'.format(i, i, quoteattr(rule)))
+    return ''.join(controls)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замер отбора строк по '
+                                                 'спецификам в контролях')
+    parser.add_argument('--terms', type=int, default=20000,
+                        help='кол-во строк раздела с разными спецификами')
+    parser.add_argument('--controls', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    params = dict(sections=1, rows=1, columns=2, terms=args.terms,
+                  controls=0, report_rows=args.terms)
+    schema_xml = generate_schema(**params).replace(
+        b'<controls>',
+        b'<controls>' + generate_controls(args.controls,
+                                          args.terms).encode('utf-8'))
+    schema = parse_schema(schema_xml)
+    report = parse_report(generate_report(**params))
+
+    start = time.perf_counter()
+    errors = schema.validate(report)
+    elapsed = time.perf_counter() - start
+    print(f'{args.terms} rows, {args.controls} controls: '
+          f'{len(errors)} errors, validate {elapsed:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
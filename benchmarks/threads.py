@@ -0,0 +1,139 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rosstat.flc import parse_schema, parse_report  # noqa: E402
+from rosstat.errors import dump_errors  # noqa: E402
+from rosstat.validators.control.inspectors.formula import ControlParams  # noqa
+from rosstat.validators.control.parser import (get_parser,  # noqa: E402
+                                               get_program, set_frontend)
+from workload import WORKLOADS, generate_schema, generate_report  # noqa: E402
+from formula_parser import dump_tree, structured_formulas  # noqa: E402
+from compiled_controls import (random_comparisons, _outcome,  # noqa: E402
+                               _interpret)
+
+
+def _validate(schema, report_xml):
+    '''Разбор и проверка отчёта, результат в виде JSON'''
+    return dump_errors(schema.validate(parse_report(report_xml),
+                                       records=True))
+
+
+def _schema_formulas(schema):
+    '''Формулы схемы, скомпилированные при её загрузке'''
+    return {control.attrib[attr].strip() for control in schema.controls
+            for attr in ('condition', 'rule')}
+
+
+def fresh_formulas(schema, count, seed):
+    '''Разбираемые формулы, которых нет в схеме. Они ещё не разобраны
+       и не скомпилированы, get_program не возвращает их из памяти
+    '''
+    known = _schema_formulas(schema)
+    formulas = []
+    for formula in dict.fromkeys(structured_formulas()
+                                 + random_comparisons(count, seed)):
+        if formula in known:
+            continue
+        try:
+            if get_parser().parse(formula) is not None:
+                formulas.append(formula)
+        except Exception:
+            pass
+    return formulas
+
+
+def _parse_and_run(formula, report, params):
+    '''Дерево формулы и результат её скомпилированной функции'''
+    return (dump_tree(get_parser().parse(formula)),
+            _outcome(get_program(formula), report, params))
+
+
+def check_parsing(args, params):
+    '''Разбор и компиляция новых формул из нескольких потоков. Каждый
+       поток разбирает формулы своим парсером, get_program компилирует
+       их одновременно. Деревья сверяются с разобранными в одном потоке,
+       результаты функций - с проверкой деревом элементов
+    '''
+    set_frontend(args.frontend)
+    schema = parse_schema(generate_schema(**params))
+    report = parse_report(generate_report(**params))
+    control_params = ControlParams(True, schema.formats, schema.catalogs,
+                                   schema.dimension, 2, 0.0)
+    formulas = fresh_formulas(schema, args.formulas, seed=args.seed)
+
+    expected = [(dump_tree(get_parser().parse(formula)),
+                 _outcome(_interpret(formula), report, control_params))
+                for formula in formulas]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        results = list(pool.map(lambda formula: _parse_and_run(
+            formula, report, control_params), formulas))
+    concurrent = time.perf_counter() - start
+
+    mismatches = [formula for formula, result, expect in
+                  zip(formulas, results, expected) if result != expect]
+    for formula in mismatches[:10]:
+        print('MISMATCH', repr(formula))
+    print(f'{args.workload}: {len(formulas)} new formulas, '
+          f'{args.threads} threads, {args.frontend}, '
+          f'concurrent {concurrent:.2f}s, mismatches {len(mismatches)}')
+    return 1 if mismatches else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочная проверка '
+                                                 'отчётов из нескольких '
+                                                 'потоков')
+    parser.add_argument('workload', nargs='?', default='small',
+                        choices=sorted(WORKLOADS))
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--reports', type=int, default=8,
+                        help='кол-во различных отчётов')
+    parser.add_argument('--rounds', type=int, default=4,
+                        help='кол-во проверок каждого отчёта')
+    parser.add_argument('--parse', action='store_true',
+                        help='одновременный разбор и компиляция новых '
+                             'формул вместо проверки отчётов')
+    parser.add_argument('--frontend', default='ply', choices=('ply', 'pratt'))
+    parser.add_argument('--formulas', type=int, default=2000,
+                        help='кол-во случайных формул для разбора')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    params = WORKLOADS[args.workload]
+    if args.parse:
+        return check_parsing(args, params)
+
+    schema = parse_schema(generate_schema(**params))
+    reports = [generate_report(**params, seed=seed)
+               for seed in range(args.reports)]
+
+    start = time.perf_counter()
+    expected = [_validate(schema, report) for report in reports]
+    sequential = time.perf_counter() - start
+
+    tasks = list(range(args.reports)) * args.rounds
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        results = list(pool.map(lambda i: _validate(schema, reports[i]),
+                                tasks))
+    concurrent = time.perf_counter() - start
+
+    mismatches = sum(result != expected[i]
+                     for i, result in zip(tasks, results))
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f'{args.workload}: {len(tasks)} validations, '
+          f'{args.threads} threads, GIL {"on" if gil else "off"}, '
+          f'sequential {sequential * args.rounds:.2f}s (estimated), '
+          f'concurrent {concurrent:.2f}s, mismatches {mismatches}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import random
+from xml.sax.saxutils import quoteattr
+
+WORKLOADS = {
+    'small': dict(sections=2, rows=20, columns=4, terms=100,
+                  controls=50, report_rows=50),
+    'medium': dict(sections=5, rows=100, columns=8, terms=5000,
+                   controls=1000, report_rows=2000),
+    'large': dict(sections=10, rows=200, columns=10, terms=50000,
+                  controls=5000, report_rows=20000),
+}
+
+
+def term_id(i):
+    '''Код термина справочника вида "01.02.03"'''
+    return '{:02}.{:02}.{:02}'.format(i // 10000 % 100, i // 100 % 100, i % 100)
+
+
+def row_code(i):
+    return str(100 + i + 1)
+
+
+def _attrs(**attrs):
+    return ' '.join(f'{key}={quoteattr(str(value))}'
+                    for key, value in attrs.items())
+
+
+def _formula(rnd, sections, rows, columns, terms):
+    '''Случайная формула контроля одного из типичных видов'''
+    sec = rnd.randint(1, sections)
+    row = row_code(rnd.randrange(rows))
+    col = rnd.randint(3, columns + 2)
+    kind = rnd.randrange(5)
+    if kind == 0:
+        rng = f'{row_code(0)}-{row_code(rows // 2)}'
+        return f'{{[{sec}][{row}][{col}]}}|>=|{{[{sec}][{rng}][{col}]}}'
+    elif kind == 1:
+        return f'SUM{{[{sec}][*][{col}]}}|>=|SUM{{[{sec}][*][{col}]}}'
+    elif kind == 2:
+        start, end = sorted(rnd.sample(range(terms), 2))
+        spec = f'{term_id(start)}-{term_id(end)}'
+        return (f'SUM{{[{sec}][{row}][{col}][{spec}]}}|<=|'
+                f'{{[{sec}][{row}][{col}]}}')
+    elif kind == 3:
+        return (f'ROUND(ABS({{[{sec}][{row}][{col}]}}-{{[{sec}][{row}][3]}}),'
+                f' 2)|<=|ISNULL({{[{sec}][{row}][{col}]}}, 0)')
+    return (f'{{[{sec}][{row}][{col}]}}|=|0|or|'
+            f'{{[{sec}][{row}][3]}}|>|0')
+
+
+def generate_formulas(count, sections=5, rows=100, columns=8, terms=5000,
+                      seed=0):
+    '''Генерация формул контролей'''
+    rnd = random.Random(seed)
+    return [_formula(rnd, sections, rows, columns, terms)
+            for _ in range(count)]
+
+
+def generate_schema(sections, rows, columns, terms, controls, seed=0,
+                    **kwargs):
+    '''Генерация XML схемы с указанными размерами'''
+    rnd = random.Random(seed)
+    parts = ['<?xml version="1.0" encoding="utf-8"?>',
+             '<metaForm code="0000001" idp="4" obj="okpo">',
+             '<title><item field="okpo" name="ОКПО"/>'
+             '<item field="name" name="Наименование"/></title>',
+             '<sections>']
+
+    for sec in range(1, sections + 1):
+        parts.append(f'<section code="{sec}"><columns>')
+        parts.append('<column code="1" type="B" fld=""/>')
+        parts.append('<column code="2" type="S" fld="s1"/>')
+        for col in range(3, columns + 3):
+            parts.append(f'<column code="{col}" type="Z" fld="">'
+                         '<default-cell format="N(12,2)" vldType="" vld="" '
+                         'dic="" inputType="0"/></column>')
+        parts.append('</columns><rows>')
+        for i in range(rows):
+            parts.append(f'<row code="{row_code(i)}" type="F">'
+                         '<cell column="2" format="C(8)" dic="okved" '
+                         'vldType="4" vld="okved" inputType="0"/></row>')
+        parts.append('</rows></section>')
+    parts.append('</sections><controls>')
+
+    formulas = generate_formulas(controls, sections, rows, columns, terms,
+                                 seed)
+    for i, formula in enumerate(formulas, 1):
+        parts.append('<control {}/>'.format(_attrs(
+            id=i, name=f'Контроль {i}', rule=formula, condition='',
+            tip=rnd.randint(0, 1), fault='0', precision='2'
+        )))
+    parts.append('</controls><dics><dic id="okved">')
+    for i in range(terms):
+        parts.append(f'<term id="{term_id(i)}" name="Термин {i}"/>')
+    parts.append('</dic><dic id="s_time">')
+    for i in range(1, 5):
+        parts.append(f'<term id="{i}"/>')
+    parts.append('</dic></dics></metaForm>')
+    return '\n'.join(parts).encode('utf-8')
+
+
+def generate_report(sections, rows, columns, terms, report_rows, seed=0,
+                    **kwargs):
+    '''Генерация XML отчёта, соответствующего схеме с теми же размерами'''
+    rnd = random.Random(seed)
+    parts = ['<?xml version="1.0" encoding="utf-8"?>',
+             '<report code="0000001" year="2022" period="0402">',
+             '<title><item name="okpo" value="12345678"/>'
+             '<item name="name" value="Организация"/></title>',
+             '<sections>']
+
+    per_section = max(report_rows // sections, 1)
+    for sec in range(1, sections + 1):
+        parts.append(f'<section code="{sec}">')
+        specs = rnd.sample(range(terms), min(per_section, terms))
+        for i, spec in enumerate(specs):
+            parts.append(f'<row code="{row_code(i % rows)}" '
+                         f's1="{term_id(spec)}">')
+            for col in range(3, columns + 3):
+                value = rnd.choice(('0', '1', '', str(rnd.randint(0, 999))))
+                if value:
+                    parts.append(f'<col code="{col}">{value}</col>')
+            parts.append('</row>')
+        parts.append('</section>')
+    parts.append('</sections></report>')
+    return '\n'.join(parts).encode('utf-8')
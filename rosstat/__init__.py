@@ -0,0 +1,5 @@
+import logging
+
+__version__ = '1.4.0.dev0'
+
+logging.getLogger(__name__).addHandler(logging.NullHandler())
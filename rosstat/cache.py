@@ -0,0 +1,104 @@
+import os
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from .errors import ErrorRecord, dump_errors
+from .validators.base import Error
+
+
+class ResultCache:
+    '''Кэш результатов проверки. Ключ - хэш схемы (с учётом версии
+       библиотеки) и канонический хэш данных отчёта. Результаты хранятся
+       в памяти (LRU на maxsize записей) и, если указан path, в локальной
+       базе SQLite. Прерванные проверки (ошибки группы 0) не кэшируются
+    '''
+    def __init__(self, maxsize=1024, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._db_pid = None
+
+    def __repr__(self):
+        return '<ResultCache size={} hits={} misses={}>'.format(
+            len(self._memory), self.hits, self.misses)
+
+    def __len__(self):
+        return len(self._memory)
+
+    @staticmethod
+    def key(schema, report):
+        '''Ключ записи для пары схема-отчёт'''
+        return schema.digest + report.digest()
+
+    def get(self, key):
+        '''Сохранённые ошибки, либо None'''
+        with self._lock:
+            errors = self._memory.get(key)
+            if errors is not None:
+                self._memory.move_to_end(key)
+            elif self.path is not None:
+                errors = self.__db_get(key)
+                if errors is not None:
+                    self.__memory_put(key, errors)
+
+            if errors is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return errors
+
+    def put(self, key, errors):
+        '''Сохранение ошибок, если проверка не была прервана'''
+        if any(error.group == '0' for error in errors):
+            return
+
+        errors = list(errors)
+        with self._lock:
+            self.__memory_put(key, errors)
+            if self.path is not None:
+                self.__db_put(key, errors)
+
+    def clear(self):
+        '''Очистка кэша в памяти и на диске'''
+        with self._lock:
+            self._memory.clear()
+            if self.path is not None:
+                with self.__connect() as db:
+                    db.execute('DELETE FROM results')
+
+    def __memory_put(self, key, errors):
+        self._memory[key] = errors
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def __connect(self):
+        '''Соединение с базой. После fork открывается новое соединение'''
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS results '
+                             '(key BLOB PRIMARY KEY, errors TEXT)')
+            self._db_pid = os.getpid()
+        return self._db
+
+    def __db_get(self, key):
+        row = self.__connect().execute(
+            'SELECT errors FROM results WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            return [self.__load_record(error) for error in json.loads(row[0])]
+
+    def __db_put(self, key, errors):
+        with self.__connect() as db:
+            db.execute('INSERT OR REPLACE INTO results VALUES (?, ?)',
+                       (key, dump_errors(errors, ensure_ascii=False)))
+
+    @staticmethod
+    def __load_record(error):
+        '''Восстановление записи об ошибке из словаря'''
+        group, code = error['code'].split('.', 1)
+        return ErrorRecord(group, error['name'],
+                           Error(error['description'], code, error['level']))
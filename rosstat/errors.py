@@ -0,0 +1,74 @@
+from collections.abc import Mapping
+from json.encoder import encode_basestring, encode_basestring_ascii
+from .validators.base import Error
+
+RECORD_KEYS = ('code', 'name', 'description', 'level')
+RECORD_TEMPLATE = '{{"code": {}, "name": {}, "description": {}, "level": {}}}'
+
+
+class ErrorRecord(Mapping):
+    '''Запись об ошибке в результатах проверки. Ведёт себя как словарь
+       с ключами code, name, description, level. Описание ошибки
+       формируется только при обращении к нему
+    '''
+    __slots__ = ('group', 'name', 'error')
+
+    def __init__(self, group, name, error):
+        self.group = group
+        self.name = name
+        self.error = error
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def __getitem__(self, key):
+        if key not in RECORD_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(RECORD_KEYS)
+
+    def __len__(self):
+        return len(RECORD_KEYS)
+
+    @property
+    def code(self):
+        return f'{self.group}.{self.error.code}'
+
+    @property
+    def description(self):
+        return self.error.description
+
+    @property
+    def level(self):
+        return self.error.level
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in RECORD_KEYS}
+
+
+def service_error(code, name, description):
+    '''Запись о прерывании проверки (группа 0)'''
+    return ErrorRecord('0', name, Error(description, code, 0))
+
+
+def dump_errors(errors, ensure_ascii=True):
+    '''Сериализация списка ошибок в JSON. Результат совпадает с json.dumps
+       для списка словарей, но не создаёт промежуточных объектов
+    '''
+    encode = encode_basestring_ascii if ensure_ascii else encode_basestring
+    names = {}
+
+    def __encode_name(name):
+        if name not in names:
+            names[name] = encode(name)
+        return names[name]
+
+    return '[{}]'.format(', '.join(
+        RECORD_TEMPLATE.format(encode(error['code']),
+                               __encode_name(error['name']),
+                               encode(error['description']),
+                               int(error['level']))
+        for error in errors
+    ))
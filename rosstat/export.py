@@ -0,0 +1,124 @@
+import csv
+from .helpers import SPEC_KEYS
+
+REPORT_FIELD = 'report'
+CELL_FIELDS = ('section', 'row', *SPEC_KEYS, 'column', 'value', 'null')
+STRING_FIELDS = ('section', 'row', *SPEC_KEYS, 'column')
+
+
+def _numpy():
+    '''Модуль numpy. Нужен только для выгрузки в массивы, поэтому
+       не входит в обязательные зависимости
+    '''
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('Выгрузка в массивы требует пакет numpy '
+                          '(pip install rosstat-flc[numpy])') from None
+    return numpy
+
+
+def read_value(text):
+    '''Числовое значение ячейки, либо None для пустого или нечислового
+       значения, как в формулах контролей
+    '''
+    try:
+        return float(text)
+    except (ValueError, TypeError):
+        return None
+
+
+class ColumnarData:
+    '''Ячейки отчётов по колонкам: коды раздела, строки, специфики, графы,
+       числовое значение и признак пустого значения. При выгрузке
+       нескольких отчётов первой идёт колонка с идентификатором отчёта.
+       Данные берутся из уже прочитанных разделов отчёта
+    '''
+    def __init__(self, with_report=False):
+        self.fields = ((REPORT_FIELD,) if with_report else ()) + CELL_FIELDS
+        self.columns = {field: [] for field in self.fields}
+
+    def __repr__(self):
+        return '<ColumnarData fields={} cells={}>'.format(self.fields,
+                                                          len(self))
+
+    def __len__(self):
+        return len(self.columns['value'])
+
+    def add(self, report, report_id=None):
+        '''Добавление ячеек отчёта. Пустые специфики выгружаются пустой
+           строкой, строки без ячеек не выгружаются
+        '''
+        count = len(self)
+        sections, rows, columns, values, nulls = (
+            self.columns[field]
+            for field in ('section', 'row', 'column', 'value', 'null'))
+        specs = [self.columns[key] for key in SPEC_KEYS]
+
+        for section in report.iter():
+            for row in section.iter():
+                row_specs = [row.get_spec(key) or '' for key in SPEC_KEYS]
+                for col in row.iter():
+                    value = read_value(col.value)
+                    sections.append(section.code)
+                    rows.append(row.code)
+                    for spec_column, spec in zip(specs, row_specs):
+                        spec_column.append(spec)
+                    columns.append(col.code)
+                    values.append(value)
+                    nulls.append(value is None)
+
+        if REPORT_FIELD in self.columns:
+            added = len(self) - count
+            self.columns[REPORT_FIELD].extend([report_id] * added)
+        return self
+
+    def iter_records(self):
+        '''Итератор по ячейкам в виде кортежей в порядке колонок'''
+        return zip(*(self.columns[field] for field in self.fields))
+
+    def to_csv(self, file):
+        '''Запись в текстовый поток в формате CSV с заголовком. Пустое
+           значение записывается пустой строкой, признак пустого - 0/1
+        '''
+        writer = csv.writer(file)
+        writer.writerow(self.fields)
+        for *record, value, null in self.iter_records():
+            writer.writerow((*record, '' if null else value, int(null)))
+
+    def to_numpy(self):
+        '''Словарь массивов NumPy по колонкам. Коды - строковые массивы,
+           пустые значения - NaN
+        '''
+        np = _numpy()
+        arrays = {field: np.array(self.columns[field], dtype=str)
+                  for field in STRING_FIELDS}
+        arrays['value'] = np.array([np.nan if value is None else value
+                                    for value in self.columns['value']],
+                                   dtype=np.float64)
+        arrays['null'] = np.array(self.columns['null'], dtype=bool)
+        if REPORT_FIELD in self.columns:
+            arrays[REPORT_FIELD] = np.array(self.columns[REPORT_FIELD])
+        return {field: arrays[field] for field in self.fields}
+
+    def save_npz(self, file):
+        '''Сохранение массивов в сжатый файл .npz'''
+        _numpy().savez_compressed(file, **self.to_numpy())
+
+
+def export_reports(reports, ids=None):
+    '''Выгрузка нескольких отчётов в один набор колонок. ids -
+       идентификаторы отчётов, по умолчанию номера отчётов в списке
+    '''
+    data = ColumnarData(with_report=True)
+    if ids is None:
+        for report_id, report in enumerate(reports):
+            data.add(report, report_id)
+        return data
+
+    ids, reports = list(ids), list(reports)
+    if len(ids) != len(reports):
+        raise ValueError('ids and reports must have the same length')
+    for report_id, report in zip(ids, reports):
+        data.add(report, report_id)
+    return data
@@ -1,29 +1,79 @@
 from os.path import isfile
 from io import BytesIO, BufferedIOBase
 from lxml import etree
-from .report import Report
+from .report import Report, LazyReport, ReportHeader, read_title_item
 from .schema import Schema
 
 
 def _get_xml_etree(source):
     if isinstance(source, (etree._ElementTree, etree._Element)):
         return source
-    elif isinstance(source, str) and isfile(source):
-        return etree.parse(source)
+    return etree.parse(_get_xml_source(source))
+
+
+def _get_xml_source(source):
+    if isinstance(source, str) and isfile(source):
+        return source
     elif isinstance(source, bytes):
-        return etree.parse(BytesIO(source))
+        return BytesIO(source)
     elif isinstance(source, BufferedIOBase):
-        return etree.parse(source)
+        return source
 
     raise TypeError(f'Expected ElementTree, Element, bytes, file name/path, '
                     f'or file-like object, got {source!r}')
 
 
-def parse_report(source):
-    xml_etree = _get_xml_etree(source)
-    return Report(xml_etree)
+def _iter_header_nodes(source):
+    '''Инкрементальный разбор отчёта до начала блока разделов'''
+    if isinstance(source, (etree._ElementTree, etree._Element)):
+        yield from source.xpath('/report | /report/title/item')
+        return
+
+    events = etree.iterparse(_get_xml_source(source), events=('start',))
+    for _, node in events:
+        if node.tag == 'sections':
+            break
+        yield node
+
+
+def _get_xml_loader(source):
+    '''Возвращает функцию повторного чтения источника, если источник
+       допускает повторное чтение, иначе None
+    '''
+    if isinstance(source, (str, bytes)):
+        return lambda: _get_xml_etree(source)
+    if isinstance(source, BufferedIOBase) and source.seekable():
+        position = source.tell()
+
+        def __load():
+            source.seek(position)
+            return _get_xml_etree(source)
+        return __load
+
+
+def sniff_report(source):
+    '''Чтение атрибутов корня и полей заголовка отчёта без разбора разделов'''
+    header = None
+    for node in _iter_header_nodes(source):
+        if node.tag == 'report':
+            header = ReportHeader(dict(node.attrib))
+        elif node.tag == 'item' and header is not None:
+            header.title.append(read_title_item(node))
+    return header
+
+
+def parse_report(source, lazy=False):
+    load_xml = _get_xml_loader(source) if lazy else None
+    if load_xml is None:
+        xml_etree = _get_xml_etree(source)
+        return Report(xml_etree)
+
+    header = sniff_report(source)
+    if header is None or header.year is None or header.period is None:
+        return Report(load_xml())
+    return LazyReport(header, load_xml)
 
 
-def parse_schema(source, skip_warns=False):
+def parse_schema(source, skip_warns=False, cost_order=False):
     xml_etree = _get_xml_etree(source)
-    return Schema(xml_etree, skip_warns=skip_warns)
+    return Schema(xml_etree, skip_warns=skip_warns, cost_order=cost_order)
@@ -1,18 +1,83 @@
-from collections import defaultdict
+import sys
+import hashlib
+from weakref import WeakValueDictionary
+from types import ModuleType, FunctionType, BuiltinFunctionType
 
 SPEC_KEYS = ('s1', 's2', 's3')
 
+# Приблизительные размеры структур libxml2 (xmlNode, xmlAttr) на 64-битной
+# платформе, в байтах
+XML_NODE_SIZE = 120
+XML_ATTR_SIZE = 96
+
+OPAQUE_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType)
+
 
 def str_int(v):
     return str(int(v)) if v.isdigit() else v
 
 
+def deep_sizeof(obj, seen=None):
+    '''Размер объекта в байтах с учётом вложенных объектов. Объекты,
+       id которых есть в seen, не учитываются. Объекты lxml учитываются
+       без узлов дерева, на которые они ссылаются
+    '''
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, OPAQUE_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, (str, bytes, int, float)):
+            continue
+        elif type(obj).__module__.startswith('lxml'):
+            continue
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+
+        if hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return size
+
+
+def xml_sizeof(xml):
+    '''Оценка памяти, занимаемой деревом libxml2'''
+    size = 0
+    for node in xml.iter():
+        size += XML_NODE_SIZE
+        if node.text:
+            size += XML_NODE_SIZE + len(node.text.encode())
+        for value in node.attrib.values():
+            size += XML_ATTR_SIZE + XML_NODE_SIZE + len(value.encode())
+    return size
+
+
 class SchemaFormats(dict):
+    def __init__(self):
+        super().__init__()
+        self._spec_codes = {}
+
+    def add_section(self, sec_code, specs):
+        '''Добавление раздела со словарём специфик (код графы - ключ)'''
+        self[sec_code] = {'specs': specs}
+        codes = self._spec_codes[sec_code] = {}
+        for code, key in specs.items():
+            codes.setdefault(key, code)
+
     def _get_spec_code(self, sec_code, spec_key):
         '''Возвращает из указаной секции код специфики по её ключу'''
-        for code, key in self[sec_code]['specs'].items():
-            if key == spec_key:
-                return code
+        return self._spec_codes[sec_code].get(spec_key)
 
     def get_spec_params(self, sec_code, row_code, spec_key):
         '''Возвращает для указанной секции и строки словарь параметров,
@@ -29,19 +94,135 @@ class SchemaFormats(dict):
             return False
 
 
-class NestedDefaultdict(dict):
-    def __init__(self, default_factory):
-        self.default_factory = default_factory
+class Catalog:
+    '''Справочник. Идентификаторы терминов хранятся кортежем в порядке
+       описания, значения атрибутов - кортежами по атрибутам (столбцами),
+       выровненными по идентификаторам. Значение атрибута - строка, либо
+       frozenset если термин описан несколько раз. Все строки интернированы.
+       Поиск никогда не изменяет справочник
+    '''
+    __slots__ = ('ids', '_index', '_columns', '__weakref__')
+
+    def __init__(self, terms):
+        ids, index, columns = [], {}, {}
+        for term_id, attrs in terms:
+            term_id = sys.intern(term_id)
+            position = index.setdefault(term_id, len(ids))
+            ids.append(term_id)
+
+            for attr, value in attrs:
+                column = columns.setdefault(sys.intern(attr), {})
+                column[position] = self.__merge(column.get(position),
+                                                sys.intern(value))
+
+        self.ids = tuple(ids)
+        self._index = index
+        self._columns = {attr: tuple(map(column.get, range(len(ids))))
+                         for attr, column in columns.items()}
 
     def __repr__(self):
-        return '<nesteddefaultdict {}>'.format(super().__repr__())
+        return '<Catalog terms={} attrs={}>'.format(len(self.ids),
+                                                   list(self._columns))
 
-    def __getitem__(self, key):
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, term_id):
+        return term_id in self._index
+
+    @staticmethod
+    def __merge(current, value):
+        '''Добавление значения атрибута к уже имеющимся'''
+        if current is None or current == value:
+            return value
+        if isinstance(current, str):
+            return frozenset((current, value))
+        return current | {value}
+
+    def index(self, term_id):
+        '''Позиция термина в справочнике. ValueError если его нет'''
         try:
-            return super().__getitem__(key)
+            return self._index[term_id]
         except KeyError:
-            self[key] = defaultdict(self.default_factory)
-            return self[key]
+            raise ValueError(f'{term_id!r} is not in catalog')
+
+    def range(self, start, end):
+        '''Идентификаторы терминов от start до end включительно'''
+        return self.ids[self.index(start):self.index(end) + 1]
+
+    def has(self, term_id, attr, value):
+        '''Проверка, что атрибут термина имеет указанное значение'''
+        position = self._index.get(term_id)
+        column = self._columns.get(attr)
+        if position is None or column is None:
+            return False
+
+        current = column[position]
+        if isinstance(current, str):
+            return current == value
+        return current is not None and value in current
+
+
+EMPTY_CATALOG = Catalog(())
+
+
+class CatalogPool:
+    '''Пул справочников с адресацией по содержимому. Справочники
+       с одинаковыми терминами строятся один раз и разделяются между
+       схемами. Пул хранит слабые ссылки, справочник удаляется из пула
+       вместе с последней использующей его схемой
+    '''
+    def __init__(self):
+        self._catalogs = WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._catalogs)
+
+    @staticmethod
+    def digest(terms):
+        '''Хэш содержимого справочника: идентификаторы и атрибуты
+           терминов в порядке описания
+        '''
+        blake = hashlib.blake2b(digest_size=16)
+        for term_id, attrs in terms:
+            blake.update(term_id.encode())
+            for attr, value in attrs:
+                blake.update(b'\x1f%s\x1e%s' % (attr.encode(),
+                                                  value.encode()))
+            blake.update(b'\x1d')
+        return blake.digest()
+
+    def get(self, terms):
+        '''Справочник из пула, либо новый справочник, добавленный в пул.
+           terms - список пар (идентификатор, список атрибутов)
+        '''
+        key = self.digest(terms)
+        catalog = self._catalogs.get(key)
+        if catalog is None:
+            catalog = self._catalogs[key] = Catalog(terms)
+        return catalog
+
+
+CATALOG_POOL = CatalogPool()
+
+
+class BoundedMemo(dict):
+    '''Словарь для запоминания результатов проверок. При достижении
+       максимального размера очищается целиком
+    '''
+    __slots__ = ('maxsize',)
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value):
+        if len(self) >= self.maxsize:
+            self.clear()
+        super().__setitem__(key, value)
 
 
 class MultiDict:
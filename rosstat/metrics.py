@@ -0,0 +1,162 @@
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+
+def _escape(value):
+    '''Экранирование значения метки OpenMetrics'''
+    return (str(value).replace('\\', '\\\\')
+                      .replace('"', '\\"')
+                      .replace('\n', '\\n'))
+
+
+def _format_labels(labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"'
+                          for key, value in labels) + '}' if labels else ''
+
+
+class Histogram:
+    '''Гистограмма с фиксированными границами корзин'''
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self):
+        '''Накопительные значения по корзинам, сумма и кол-во'''
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+
+class Metrics:
+    '''Метрики проверки отчётов: кол-во проверенных отчётов, время
+       проверки по этапам, размеры отчётов, кол-во ошибок по кодам.
+       Обновляется из нескольких потоков, каждое обновление - короткая
+       операция под блокировкой
+    '''
+    def __init__(self, prefix='rosstat'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+        self.reports = 0
+        self.reports_invalid = 0
+        self.reports_interrupted = 0
+        self.errors = Counter()
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.stages = {}
+        self.sizes = Histogram(SIZE_BUCKETS)
+
+    def __repr__(self):
+        return '<Metrics reports={} invalid={}>'.format(self.reports,
+                                                        self.reports_invalid)
+
+    def observe_stage(self, stage, seconds):
+        '''Время этапа проверки (код валидатора)'''
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_report(self, codes, seconds):
+        '''Итог проверки отчёта: коды найденных ошибок и общее время'''
+        with self._lock:
+            self.reports += 1
+            self.latency.observe(seconds)
+            if codes:
+                self.errors.update(codes)
+                if any(code.startswith('0.') for code in codes):
+                    self.reports_interrupted += 1
+                else:
+                    self.reports_invalid += 1
+
+    def observe_size(self, size):
+        '''Размер разобранного отчёта в байтах'''
+        with self._lock:
+            self.sizes.observe(size)
+
+    def top_controls(self, top=10):
+        '''Контроли, проверку которых отчёты не проходят чаще всего'''
+        with self._lock:
+            controls = Counter({code.split('.', 1)[1]: count
+                                for code, count in self.errors.items()
+                                if code.startswith('4.')})
+        return controls.most_common(top)
+
+    def snapshot(self, top=10):
+        '''Снимок метрик в виде словаря'''
+        top_controls = self.top_controls(top)
+        with self._lock:
+            return {
+                'reports': self.reports,
+                'reports_invalid': self.reports_invalid,
+                'reports_interrupted': self.reports_interrupted,
+                'latency': self.latency.to_dict(),
+                'stages': {stage: histogram.to_dict()
+                           for stage, histogram in self.stages.items()},
+                'sizes': self.sizes.to_dict(),
+                'errors': dict(self.errors),
+                'top_controls': top_controls
+            }
+
+    def to_openmetrics(self):
+        '''Метрики в текстовом формате OpenMetrics'''
+        with self._lock:
+            lines = []
+            self.__counter(lines, 'reports_validated', 'Проверено отчётов',
+                           [((), self.reports)])
+            self.__counter(lines, 'reports_invalid',
+                           'Отчётов с ошибками', [((), self.reports_invalid)])
+            self.__counter(lines, 'reports_interrupted',
+                           'Прерванных проверок',
+                           [((), self.reports_interrupted)])
+            self.__counter(lines, 'errors', 'Ошибок по кодам',
+                           [((('code', code),), count)
+                            for code, count in sorted(self.errors.items())])
+            self.__histogram(lines, 'validation_seconds',
+                             'Время проверки отчёта',
+                             [((), self.latency)])
+            self.__histogram(lines, 'stage_seconds',
+                             'Время этапа проверки',
+                             [((('stage', stage),), histogram)
+                              for stage, histogram
+                              in sorted(self.stages.items())])
+            self.__histogram(lines, 'report_bytes', 'Размер отчёта',
+                             [((), self.sizes)])
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def __counter(self, lines, name, help, samples):
+        name = f'{self.prefix}_{name}'
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'# HELP {name} {help}')
+        for labels, value in samples:
+            lines.append(f'{name}_total{_format_labels(labels)} {value}')
+
+    def __histogram(self, lines, name, help, samples):
+        name = f'{self.prefix}_{name}'
+        lines.append(f'# TYPE {name} histogram')
+        lines.append(f'# HELP {name} {help}')
+        for labels, histogram in samples:
+            for bound, count in histogram.to_dict()['buckets'].items():
+                bucket_labels = labels + (('le', bound),)
+                lines.append(f'{name}_bucket{_format_labels(bucket_labels)} '
+                             f'{count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} '
+                         f'{histogram.sum}')
+            lines.append(f'{name}_count{_format_labels(labels)} '
+                         f'{histogram.count}')
@@ -0,0 +1,194 @@
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from .report import CodeIterable, Section, Row, EMPTY_ITER
+
+PriorKey = namedtuple('PriorKey', ('form', 'okpo', 'year', 'period'))
+
+
+class StoredReport(CodeIterable):
+    '''Данные отчёта, прочитанные из хранилища: разделы, строки
+       и ячейки без заголовка
+    '''
+    def __init__(self, data=None):
+        self._data = data or {}
+
+    def __repr__(self):
+        return '<StoredReport sections={}>'.format(list(self._data))
+
+    def _iter_all(self):
+        '''Возвращает итератор по всем разделам'''
+        return self._data.values()
+
+    def _iter_codes(self, codes):
+        '''Итерируемся по кодам, возвращаем разделы'''
+        for code in codes:
+            yield self.get_section(code)
+
+    def get_section(self, code):
+        '''Возвращает раздел с указанным кодом'''
+        return self._data.get(code, EMPTY_ITER)
+
+
+class PriorStore:
+    '''Хранилище данных отчётов для контролей со значениями за прошлый
+       период (элементы в двух фигурных скобках). Ключ отчёта - код формы,
+       ОКПО, год и период. Наследники реализуют запись (save) и чтение
+       (load) данных по ключу
+    '''
+    def key(self, schema, report):
+        '''Ключ отчёта, либо None, если год или период не распознаны.
+           Период приводится к виду тип и код периода, как в приказе
+           Росстата, так что оба способа указания периода дают один ключ.
+           ОКПО берётся из поля заголовка, указанного в атрибуте obj схемы
+        '''
+        if report.period_code is None:
+            report.set_periods(schema.catalogs, schema.idp)
+        try:
+            year = int(report.year)
+            period_type = int(report.period_type)
+            period_code = int(report.period_code)
+        except (TypeError, ValueError):
+            return None
+
+        okpo = next((item.value for item in report.title
+                     if item.name == schema.obj), '')
+        return PriorKey(schema.code or '', okpo, str(year),
+                        f'{period_type:02}{period_code:02}')
+
+    def previous_key(self, schema, report):
+        '''Ключ отчёта за прошлый период: предыдущий код периода, для
+           первого периода года - последний период (код равен типу)
+           прошлого года. None, если период отчёта не распознан
+        '''
+        key = self.key(schema, report)
+        if key is None:
+            return None
+
+        year = int(key.year)
+        period_type, period_code = int(key.period[:2]), int(key.period[2:])
+        if period_code > 1:
+            period_code -= 1
+        else:
+            year, period_code = year - 1, period_type
+        return key._replace(year=str(year),
+                            period=f'{period_type:02}{period_code:02}')
+
+    def put(self, schema, report):
+        '''Сохранение данных отчёта'''
+        key = self.key(schema, report)
+        if key is None:
+            raise ValueError('report year or period is not recognized')
+        self.save(key, report)
+
+    def previous(self, schema, report, sections=None):
+        '''Данные отчёта за прошлый период (StoredReport). sections - коды
+           нужных разделов, "*" среди них или None - все разделы. None,
+           если отчёта за прошлый период в хранилище нет
+        '''
+        key = self.previous_key(schema, report)
+        if key is None:
+            return None
+        return self.load(key, sections)
+
+    def save(self, key, report):
+        raise NotImplementedError
+
+    def load(self, key, sections=None):
+        '''Данные отчёта (StoredReport), либо None, если его нет'''
+        raise NotImplementedError
+
+
+class SQLitePriorStore(PriorStore):
+    '''Хранилище в локальной базе SQLite. Ячейки индексируются по ключу
+       отчёта, разделу, строке, спецификам и графе, данные отчёта читаются
+       одним запросом. Строки без ячеек и разделы без строк сохраняются
+       с пустыми графой и строкой, отметка о наличии отчёта - с пустым
+       разделом
+    '''
+    def __init__(self, path):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._db = self._db_pid = None
+
+    def __repr__(self):
+        return '<SQLitePriorStore path={}>'.format(self.path)
+
+    def __connect(self):
+        '''Соединение с базой. После fork открывается новое соединение'''
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS cells '
+                             '(form TEXT, okpo TEXT, year TEXT, period TEXT, '
+                             'section TEXT, position INTEGER, row TEXT, '
+                             's1 TEXT, s2 TEXT, s3 TEXT, col TEXT, '
+                             'value TEXT)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS cells_key ON cells '
+                             '(form, okpo, year, period, section, row, '
+                             's1, s2, s3, col)')
+            self._db_pid = os.getpid()
+        return self._db
+
+    def save(self, key, report):
+        '''Замена сохранённых данных отчёта'''
+        with self._lock, self.__connect() as db:
+            db.execute('DELETE FROM cells WHERE form = ? AND okpo = ? '
+                       'AND year = ? AND period = ?', key)
+            db.executemany('INSERT INTO cells VALUES '
+                           '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                           self.__iter_cells(key, report))
+
+    def __iter_cells(self, key, report):
+        '''Записи таблицы ячеек в порядке следования в отчёте'''
+        yield (*key, None, None, None, None, None, None, None, None)
+        for section in report.iter():
+            rows = list(section.iter())
+            if not rows:
+                yield (*key, section.code, None, None, None, None, None,
+                       None, None)
+            for position, row in enumerate(rows):
+                cells = [(col.code, col.value) for col in row.iter()]
+                for col_code, value in cells or [(None, None)]:
+                    yield (*key, section.code, position, row.code,
+                           row.s1, row.s2, row.s3, col_code, value)
+
+    def load(self, key, sections=None):
+        '''Данные отчёта одним запросом к базе'''
+        query = ('SELECT section, position, row, s1, s2, s3, col, value '
+                 'FROM cells WHERE form = ? AND okpo = ? AND year = ? '
+                 'AND period = ?')
+        args = list(key)
+        if sections is not None and '*' not in sections:
+            codes = sorted(sections)
+            query += ' AND (section IS NULL OR section IN ({}))'.format(
+                ', '.join('?' * len(codes)))
+            args.extend(codes)
+
+        with self._lock:
+            records = self.__connect().execute(query + ' ORDER BY rowid',
+                                               args).fetchall()
+        if not records:
+            return None
+        return StoredReport(self.__read_data(records))
+
+    def __read_data(self, records):
+        '''Восстановление разделов и строк из записей таблицы'''
+        data, row, last = {}, None, None
+        for sec_code, position, row_code, s1, s2, s3, col, value in records:
+            if sec_code is None:
+                continue
+            section = data.get(sec_code)
+            if section is None:
+                section = data[sec_code] = Section(sec_code)
+            if position is None:
+                continue
+
+            if (sec_code, position) != last:
+                row = Row(row_code, s1, s2, s3)
+                section.add_row(row)
+                last = (sec_code, position)
+            if col is not None:
+                row.add_col(col, value)
+        return data
@@ -1,9 +1,12 @@
+import sys
+import hashlib
 from math import gcd
 from typing import Dict, List, Optional
 from collections import defaultdict, namedtuple
 from dataclasses import dataclass, InitVar, field as f
 from lxml.etree import _ElementTree
-from .helpers import SPEC_KEYS, MultiDict, str_int
+from .helpers import SPEC_KEYS, MultiDict, str_int, deep_sizeof
+from .export import ColumnarData
 
 ANY_SPEC = {'*'}
 
@@ -16,10 +19,25 @@ class EmptyIter:
     def iter(self, *args):
         return []
 
+    def select(self, *args):
+        return []
+
 
 EMPTY_ITER = EmptyIter()
 
 
+def read_title_item(node):
+    '''Чтение поля заголовка отчёта'''
+    return Title(node.attrib.get('name'), node.attrib.get('value', '').strip())
+
+
+def split_period(period_raw):
+    '''Разбиение периода на тип и код, если период описан по приказу'''
+    if len(period_raw) == 4:
+        return str_int(period_raw[:2]), str_int(period_raw[2:])
+    return None, None
+
+
 def max_divider(num, terms):
     '''НОД для списка чисел'''
     for term_id in terms:
@@ -88,6 +106,17 @@ class Row:
                 return False
         return True
 
+    def match_values(self, specs):
+        '''Проверка строки по условиям отбора (ключ, множество значений или
+           None для любого значения, значение по умолчанию)
+        '''
+        for key, values, default in specs:
+            if values is None:
+                return True
+            elif (self.get_spec(key) or default) not in values:
+                return False
+        return True
+
     def get_spec(self, key):
         '''Возвращает указанную специфику строки или дефолтную'''
         return getattr(self, key)
@@ -99,6 +128,8 @@ class Section(CodeIterable):
 
     _rows: MultiDict = f(default_factory=MultiDict)
     _rows_counter: defaultdict = f(default_factory=lambda: defaultdict(int))
+    _positions: defaultdict = f(default_factory=lambda: defaultdict(list))
+    _indexes: tuple = f(default=None, repr=False, compare=False)
 
     @property
     def rows(self):
@@ -111,10 +142,17 @@ class Section(CodeIterable):
     # ---
 
     def add_row(self, row):
-        '''Добавление строки в раздел и приращение счётчика'''
+        '''Добавление строки в раздел и приращение счётчика. Позиция
+           строки заносится в индекс по коду, индексы по спецификам строятся
+           заново при следующем отборе строк
+        '''
+        position = len(self._rows.values)
         self._rows.add(row.code, row)
         self._rows_counter[(row.code, row.s1, row.s2, row.s3)] += 1
 
+        self._positions[row.code].append(position)
+        self._indexes = None
+
     # ---
 
     def _iter_all(self):
@@ -132,7 +170,137 @@ class Section(CodeIterable):
 
     def get_rows(self, code):
         '''Возвращает список строк"'''
-        return self._rows.get(code)
+        rows = self._rows.getall()
+        return [rows[position] for position in self._positions.get(code, ())]
+
+    # ---
+
+    def select(self, codes, get_specs):
+        '''Строки с указанными кодами, отобранные по спецификам через
+           индексы. Порядок строк и "заглушки" для отсутствующих кодов - как
+           у iter. get_specs(code) возвращает условия отбора, как для
+           Row.match_values, и вызывается для каждого кода в порядке
+           появления первой строки с этим кодом
+        '''
+        rows = self._rows.getall()
+        if codes is None or codes == ['*']:
+            positions = []
+            for code in self._positions:
+                positions.extend(self.__find(code, get_specs(code)))
+            return [rows[position] for position in sorted(positions)]
+
+        selected = []
+        for code in codes:
+            specs = get_specs(code)
+            if code not in self._positions:
+                stub = Row(code, None, None, None)
+                if stub.match_values(specs):
+                    selected.append(stub)
+                continue
+            selected.extend(rows[position]
+                            for position in self.__find(code, specs))
+        return selected
+
+    def __get_indexes(self):
+        '''Индексы позиций строк по каждой специфике и по сочетанию
+           специфик. Строятся при первом отборе строк, так что разделы,
+           из которых строки не отбираются, не занимают память под них.
+           Индексы присваиваются одним кортежем, поэтому одновременное
+           построение из нескольких потоков безопасно
+        '''
+        indexes = self._indexes
+        if indexes is not None:
+            return indexes
+
+        spec_index = defaultdict(lambda: defaultdict(list))
+        specs_index = defaultdict(list)
+        for position, row in enumerate(self._rows.getall()):
+            specs_index[(row.code, row.s1, row.s2, row.s3)].append(position)
+            for key in SPEC_KEYS:
+                spec_index[(row.code, key)][getattr(row, key)].append(
+                    position)
+        self._indexes = indexes = (spec_index, specs_index)
+        return indexes
+
+    def __find(self, code, specs):
+        '''Позиции строк с кодом code, подходящих под условия отбора'''
+        if self.__is_exact(specs):
+            key = (code, *(next(iter(values)) for _, values, _ in specs))
+            return self.__get_indexes()[1].get(key, [])
+
+        positions = None
+        for key, values, default in specs:
+            if values is None:
+                break
+            found = self.__find_values(code, key, values, default)
+            positions = found if positions is None else positions & found
+            if not positions:
+                return []
+
+        if positions is None:
+            return self._positions[code]
+        return sorted(positions)
+
+    def __is_exact(self, specs):
+        '''Условия на все специфики - по одному непустому значению,
+           не совпадающему со значением по умолчанию
+        '''
+        return len(specs) == len(SPEC_KEYS) and all(
+            values is not None and len(values) == 1 and default not in values
+            and all(values) for _, values, default in specs
+        )
+
+    def __find_values(self, code, key, values, default):
+        '''Позиции строк, специфика которых (или значение по умолчанию
+           для пустой) входит в values. Перебирается меньшее из множества
+           значений и индекса
+        '''
+        index = self.__get_indexes()[0].get((code, key), {})
+        found = set()
+        if len(values) < len(index):
+            for value in values:
+                if value and value in index:
+                    found.update(index[value])
+            if default in values:
+                found.update(index.get(None, ()))
+                found.update(index.get('', ()))
+        else:
+            for value, positions in index.items():
+                if (value or default) in values:
+                    found.update(positions)
+        return found
+
+
+@dataclass
+class ReportHeader:
+    attrib: Dict[str, str]
+    title: List[Title] = f(default_factory=list)
+
+    @property
+    def year(self):
+        return self.attrib.get('year')
+
+    @property
+    def period(self):
+        return self.attrib.get('period')
+
+    @property
+    def period_type(self):
+        return split_period(self.period or '')[0]
+
+    @property
+    def period_code(self):
+        return split_period(self.period or '')[1]
+
+    @property
+    def code(self):
+        return self.attrib.get('code')
+
+    def get_field(self, name):
+        '''Возвращает значение поля заголовка'''
+        for item in self.title:
+            if item.name == name:
+                return item.value
 
 
 @dataclass
@@ -168,6 +336,10 @@ class Report(CodeIterable):
     def title(self):
         return self._title
 
+    @property
+    def period(self):
+        return self._period_raw
+
     @property
     def period_type(self):
         return self._period_type
@@ -197,8 +369,7 @@ class Report(CodeIterable):
         '''Чтение заголовков отчёта'''
         title = []
         for node in xml.xpath('/report/title/item'):
-            title.append(Title(node.attrib.get('name'),
-                               node.attrib.get('value', '').strip()))
+            title.append(read_title_item(node))
         return title
 
     # ---
@@ -238,12 +409,59 @@ class Report(CodeIterable):
     def _get_periods(self, xml):
         '''Получение и разбиение периода из корня отчёта'''
         self._period_raw = xml.xpath('/report/@period')[0]
-        if len(self._period_raw) == 4:
-            self._period_type = str_int(self._period_raw[:2])
-            self._period_code = str_int(self._period_raw[2:])
+        self._period_type, self._period_code = split_period(self._period_raw)
 
     # ---
 
+    def memory_usage(self):
+        '''Оценка занимаемой отчётом памяти в байтах по компонентам.
+           Каждый компонент учитывается без вложенных в него следующих:
+           разделы без строк, строки без ячеек
+        '''
+        seen = set()
+        sections = list(self.iter())
+        rows = [row for section in sections for row in section.iter()]
+
+        usage = {
+            'title': deep_sizeof(self._title, seen),
+            'cells': sum(deep_sizeof(row._cols, seen) for row in rows),
+            'rows': deep_sizeof(rows, seen) - sys.getsizeof(rows),
+            'sections': deep_sizeof(self._data, seen)
+        }
+        usage['total'] = sum(usage.values())
+        return usage
+
+    def digest(self):
+        '''Канонический хэш данных отчёта: год, период, поля заголовка,
+           разделы, строки со спецификами и значения ячеек в порядке
+           следования. Не зависит от форматирования и порядка атрибутов XML
+        '''
+        blake = hashlib.blake2b(digest_size=16)
+
+        def __update(*values):
+            for value in values:
+                blake.update(b'\x1f' if value is None
+                             else b'\x1e' + value.encode())
+
+        __update(self._year, self._period_raw)
+        for item in self._title:
+            __update(item.name, item.value)
+        for section in self.iter():
+            blake.update(b'\x1d')
+            __update(section.code)
+            for row in section.iter():
+                blake.update(b'\x1c')
+                __update(row.code, row.s1, row.s2, row.s3)
+                for column in row.iter():
+                    __update(column.code, column.value)
+        return blake.digest()
+
+    def to_columns(self):
+        '''Ячейки отчёта по колонкам (ColumnarData) для выгрузки
+           в массивы NumPy (to_numpy, save_npz) или CSV (to_csv)
+        '''
+        return ColumnarData().add(self)
+
     def set_periods(self, catalogs, idp):
         '''Попытка привести тип и код периода к формату
            описанному в приказе Росстата
@@ -274,6 +492,44 @@ class Report(CodeIterable):
     def _get_periods_id(self, catalogs):
         '''Получение идентификаторов допустимых периодов из справочника'''
         try:
-            return [int(term_id) for term_id in catalogs['s_time']['ids']]
+            return [int(term_id) for term_id in catalogs['s_time']]
         except KeyError:
-            return [int(term_id) for term_id in catalogs['s_mes']['ids']]
+            return [int(term_id) for term_id in catalogs['s_mes']]
+
+
+class LazyReport(Report):
+    '''Отчёт, разделы которого читаются из источника только при первом
+       обращении к ним. Атрибуты и заголовок берутся из ReportHeader,
+       в котором должны быть год и период (parse_report разбирает отчёт
+       без них сразу, как Report)
+    '''
+    def __init__(self, header, load_xml):
+        self._load_xml = load_xml
+        self._sections = None
+
+        self._blank = True
+        self._year = header.year
+        self._title = header.title
+        self._period_raw = header.period
+        self._period_type, self._period_code = split_period(header.period)
+
+    def __repr__(self):
+        return '<LazyReport title={} loaded={}>'.format(
+            self._title,
+            self._sections is not None
+        )
+
+    @property
+    def _data(self):
+        return self._load()
+
+    @property
+    def blank(self):
+        self._load()
+        return self._blank
+
+    def _load(self):
+        '''Чтение разделов отчёта при первом обращении к ним'''
+        if self._sections is None:
+            self._sections = self._read_data(self._load_xml())
+        return self._sections
@@ -1,31 +1,69 @@
-import traceback
+import hashlib
+import logging
+from time import perf_counter
+from lxml import etree
+from operator import itemgetter
 from collections import defaultdict
-from .helpers import SchemaFormats, NestedDefaultdict, str_int
+from . import __version__
+from .errors import ErrorRecord, service_error
+from .helpers import (SchemaFormats, CATALOG_POOL, str_int,
+                      deep_sizeof, xml_sizeof)
 from .validators import (AttrValidator, TitleValidator,
                          FormatValidator, ControlValidator)
+from .validators.base import Deadline, TimeBudgetExceeded
+from .validators.format.inspectors import SpecRules, ValueRules
+from .validators.control.inspectors import CostInspector
+from .validators.control.parser import get_program
+from .validators.control.parser.specific import ExpandedSpecifics
+
+logger = logging.getLogger(__name__)
 
 
 class Schema:
-    def __init__(self, xml_tree, *, skip_warns):
+    def __init__(self, xml_tree, *, skip_warns, cost_order=False):
         self.xml = xml_tree
         self.errors = []
         self.required = []
         self.skip_warns = skip_warns
+        self.cost_order = cost_order
         self.dimension = defaultdict(list)
 
+        self.code = self._get_code()
         self.idp = self._get_idp()
         self.obj = self._get_obj()
         self.title = self._get_title()
         self.formats = self._get_formats()
         self.controls = self._get_controls()
         self.catalogs = self._get_catalogs()
+        self.spec_rules = self._get_spec_rules()
+        self.value_rules = self._get_value_rules()
+        self.controls_cost = self._get_controls_cost()
+        self.specifics = self._get_specifics()
+        self.prior_sections = self._get_prior_sections()
+        self.digest = self._get_digest()
 
-        self.validators = self._init_validators()
+        if cost_order:
+            self._sort_controls()
 
     def __repr__(self):
         return '<Schema idp={idp} obj={obj} title={title}'.format(
             **self.__dict__)
 
+    def _get_digest(self):
+        '''Хэш схемы с учётом версии библиотеки, порядка контролей
+           и пропуска предупреждений
+        '''
+        blake = hashlib.blake2b(digest_size=16)
+        blake.update(f'{__version__}:{self.cost_order:d}:'
+                     f'{self.skip_warns:d}:'.encode())
+        blake.update(etree.tostring(self.xml, method='c14n'))
+        return blake.digest()
+
+    def _get_code(self):
+        '''Получение кода формы (атрибут code), если он указан'''
+        code = self.xml.xpath('/metaForm/@code')
+        return code[0] if code else None
+
     def _get_idp(self):
         '''Получение атрибута idp'''
         return str(int(self.xml.xpath('/metaForm/@idp')[0]))
@@ -46,7 +84,7 @@ class Schema:
         for section in self.xml.xpath('/metaForm/sections/section'):
             sec_code = str_int(section.attrib['code'])
             defaults, specs = self.__get_default_formats(section, sec_code)
-            form[sec_code] = {'specs': specs}
+            form.add_section(sec_code, specs)
 
             for row in section.xpath('./rows/row[@type!="C"]'):
                 row_code = str_int(row.attrib['code'])
@@ -88,56 +126,264 @@ class Schema:
         except AttributeError:
             return {}
 
+    def _get_spec_rules(self):
+        '''Подготовка правил проверки специфик строк для каждого раздела'''
+        return {sec_code: SpecRules(rows, self.catalogs)
+                for sec_code, rows in self.formats.items()}
+
+    def _get_value_rules(self):
+        '''Подготовка правил проверки значений ячеек. Ячейки с одинаковыми
+           параметрами во всей схеме разделяют одно правило
+        '''
+        inspectors = {}
+        return {sec_code: ValueRules(rows, self.catalogs, inspectors)
+                for sec_code, rows in self.formats.items()}
+
     def _get_controls(self):
         '''Получение нод с контролями'''
         return self.xml.xpath('/metaForm/controls/control')
 
+    def _get_controls_cost(self):
+        '''Оценка стоимости проверки каждого контроля. Контроль, оценить
+           который не удалось, ничего не стоит, ошибка в его формуле
+           обнаружится при проверке
+        '''
+        costs = {}
+        for control in self.controls:
+            inspector = CostInspector(control,
+                                      formats=self.formats,
+                                      catalogs=self.catalogs,
+                                      dimension=self.dimension)
+            try:
+                costs[inspector.id] = inspector.estimate()
+            except Exception:
+                costs[inspector.id] = 0
+                logger.exception('Control cost estimation failed',
+                                 extra={'schema': self.code,
+                                        'control': inspector.id})
+        return costs
+
+    def _get_specifics(self):
+        '''Компиляция формул контролей и развёртывание их специфик
+           для строк схемы
+        '''
+        specifics = ExpandedSpecifics(self.formats, self.catalogs)
+        for program in self.__iter_programs():
+            specifics.prepare(program.specifics)
+        return specifics
+
+    def _get_prior_sections(self):
+        '''Коды разделов, которые контроли читают из отчёта за прошлый
+           период. Пустое множество - таких контролей нет
+        '''
+        sections = set()
+        for program in self.__iter_programs():
+            sections.update(program.previous)
+        return frozenset(sections)
+
+    def __iter_programs(self):
+        '''Скомпилированные условия и правила контролей. Формулы, которые
+           не удалось скомпилировать, пропускаются, ошибка в них
+           обнаружится при проверке
+        '''
+        for control in self.controls:
+            for attr in ('condition', 'rule'):
+                formula = control.attrib[attr].strip()
+                if not formula:
+                    continue
+                try:
+                    program = get_program(formula)
+                except Exception:
+                    logger.exception('Control formula compilation failed',
+                                     extra={'schema': self.code,
+                                            'control': control.attrib['id']})
+                    continue
+                if program is not None:
+                    yield program
+
+    def _sort_controls(self):
+        '''Упорядочивание контролей от "дешёвых" к "дорогим"'''
+        self.controls.sort(key=lambda c: self.controls_cost[c.attrib['id']])
+
     def _get_catalogs(self):
-        '''Получение справочников'''
-        catalogs = defaultdict(dict)
+        '''Получение справочников. Одинаковые по содержимому справочники
+           разделяются между схемами через общий пул
+        '''
+        catalogs = {}
         for catalog in self.xml.xpath('/metaForm/dics/dic'):
             catalog_id = catalog.attrib['id']
-            catalogs[catalog_id]['full'] = NestedDefaultdict(set)
-            catalogs[catalog_id]['ids'] = []
-
-            for term_node in catalog.xpath('./term'):
-                term_id = term_node.attrib.pop('id')
+            terms = list(self.__iter_terms(catalog))
+            catalogs[catalog_id] = CATALOG_POOL.get(terms)
+        return catalogs
 
-                catalogs[catalog_id]['ids'].append(term_id)
+    def __iter_terms(self, catalog):
+        '''Итерация по терминам справочника. Возвращает идентификатор
+           термина и список остальных его атрибутов
+        '''
+        for term_node in catalog.xpath('./term'):
+            attrs = term_node.attrib
+            yield attrs['id'], [(attr, value) for attr, value in attrs.items()
+                                if attr != 'id']
 
-                for attr, value in term_node.attrib.items():
-                    catalogs[catalog_id]['full'][term_id][attr].add(value)
-        return catalogs
+    def memory_usage(self):
+        '''Оценка занимаемой схемой памяти в байтах по компонентам. Размер
+           дерева XML оценивается по кол-ву узлов и атрибутов
+        '''
+        seen = set()
+        catalogs = deep_sizeof(self.catalogs, seen)
+        usage = {
+            'formats': deep_sizeof((self.formats,
+                                    self.spec_rules,
+                                    self.value_rules,
+                                    self.required,
+                                    self.dimension), seen),
+            'catalogs': catalogs,
+            'controls': deep_sizeof((self.controls,
+                                     self.controls_cost,
+                                     self.specifics,
+                                     self.prior_sections), seen),
+            'xml': xml_sizeof(self.xml)
+        }
+        usage['total'] = sum(usage.values())
+        return usage
 
-    def _init_validators(self):
-        '''Инициализация валидаторов'''
+    def _init_validators(self, workers=None, prior=None):
+        '''Инициализация валидаторов. Валидаторы хранят состояние проверки,
+           поэтому для каждого отчёта создаются заново
+        '''
         return (AttrValidator(self),
                 TitleValidator(self),
                 FormatValidator(self),
-                ControlValidator(self))
+                ControlValidator(self, workers, prior))
+
+    def validate(self, report, *, max_errors=None, time_budget=None,
+                 cache=None, metrics=None, workers=None, prior=None,
+                 records=False):
+        '''Валидация отчёта. Возвращает список словарей с ключами code,
+           name, description, level, либо с флагом records - список
+           записей ErrorRecord, описание которых формируется только при
+           обращении к нему (например, в dump_errors). Если передан кэш
+           (ResultCache), результат для уже проверенного отчёта берётся
+           из него. Если переданы метрики (Metrics), в них учитывается
+           результат проверки. workers - кол-во процессов для параллельной
+           проверки контролей. Если передано хранилище прошлых периодов
+           (PriorStore), контроли со значениями за прошлый период
+           проверяются по нему, результат такой проверки не кэшируется
+        '''
+        errors = self._validate(report, max_errors, time_budget, cache,
+                                metrics, workers, prior)
+        if not records:
+            errors = [error.to_dict() for error in errors]
+        self.errors = errors
+        return errors
+
+    def _validate(self, report, max_errors, time_budget, cache, metrics,
+                  workers, prior):
+        '''Записи об ошибках отчёта с учётом кэша'''
+        key = None
+        if cache is not None and not (prior is not None
+                                      and self.prior_sections):
+            start = perf_counter()
+            key = cache.key(self, report)
+            errors = cache.get(key)
+            if errors is not None:
+                errors = self._limit_errors(errors, max_errors)
+                if metrics is not None:
+                    metrics.observe_report([e.code for e in errors],
+                                           perf_counter() - start)
+                return errors
+
+        errors = list(self.iter_errors(report,
+                                       max_errors=max_errors,
+                                       time_budget=time_budget,
+                                       metrics=metrics,
+                                       workers=workers,
+                                       prior=prior))
+        if key is not None:
+            cache.put(key, errors)
+        return errors
+
+    def _limit_errors(self, errors, max_errors):
+        '''Применение лимита кол-ва ошибок к сохранённому результату'''
+        if max_errors is None or len(errors) <= max_errors:
+            return list(errors)
+        return errors[:max_errors] + [service_error('1', 'Проверка прервана',
+                                                    'Достигнут лимит '
+                                                    'количества ошибок')]
+
+    def iter_errors(self, report, *, max_errors=None, time_budget=None,
+                    metrics=None, workers=None, prior=None):
+        '''Итератор по ошибкам отчёта. Ошибки отдаются по мере обнаружения,
+           проверка прерывается после первого этапа, на котором они найдены.
+           Если ошибок больше лимита или превышено время (в секундах),
+           проверка прерывается, последней отдаётся ошибка-отметка о том,
+           что результат неполный
+        '''
+        errors = self._iter_errors(report, max_errors, time_budget, metrics,
+                                   workers, prior)
+        if metrics is None:
+            yield from errors
+            return
 
-    def validate(self, report):
-        '''Валидация отчёта'''
+        start = perf_counter()
+        codes = []
         try:
-            for validator in self.validators:
-                if not validator.validate(report):
-                    self._errors_handle(validator)
+            for error in errors:
+                codes.append(error.code)
+                yield error
+        finally:
+            metrics.observe_report(codes, perf_counter() - start)
+
+    def _iter_errors(self, report, max_errors, time_budget, metrics,
+                     workers, prior=None):
+        deadline = Deadline(time_budget)
+        counter = 0
+        try:
+            for validator in self._init_validators(workers, prior):
+                stage = self._iter_stage(validator, report, deadline, metrics)
+                for error in stage:
+                    if max_errors is not None and counter >= max_errors:
+                        yield service_error('1', 'Проверка прервана',
+                                            'Достигнут лимит количества '
+                                            'ошибок')
+                        return
+                    yield self._error_handle(validator, error)
+                    counter += 1
+                if validator.errors:
                     break
+        except TimeBudgetExceeded:
+            yield service_error('2', 'Проверка прервана',
+                                'Превышено время проверки')
         except Exception:
-            self.errors.append({'code': '0.0',
-                                'name': 'Непредвиденная ошибка',
-                                'description': 'Не удалось выполнить проверку',
-                                'level': 0})
-            print('Unexpected Error', traceback.format_exc())
+            yield service_error('0', 'Непредвиденная ошибка',
+                                'Не удалось выполнить проверку')
+            logger.exception('Unexpected error', extra={'schema': self.code})
+
+    def _iter_stage(self, validator, report, deadline, metrics):
+        '''Ошибки этапа проверки с замером его времени'''
+        if metrics is None:
+            yield from validator.iter_errors(report, deadline)
+            return
+
+        start = perf_counter()
+        try:
+            yield from validator.iter_errors(report, deadline)
         finally:
-            return self.errors
-
-    def _errors_handle(self, validator):
-        '''Форматирование ошибок'''
-        for error in validator.errors:
-            self.errors.append({
-                'code': f'{validator.code}.{error.code}',
-                'name': validator.name,
-                'description': error.description,
-                'level': error.level
-            })
+            metrics.observe_stage(validator.code, perf_counter() - start)
+
+    def profile_controls(self, report, top=10):
+        '''Проверка отчёта по контролям с замером времени. Возвращает
+           самые "тяжёлые" контроли с оценкой стоимости и фактическим
+           временем проверки в секундах
+        '''
+        validator = ControlValidator(self)
+        validator.validate(report)
+
+        timings = sorted(validator.timings, key=itemgetter(1), reverse=True)
+        return [{'id': control_id,
+                 'estimate': self.controls_cost[control_id],
+                 'elapsed': elapsed} for control_id, elapsed in timings[:top]]
+
+    def _error_handle(self, validator, error):
+        '''Запись об ошибке валидатора'''
+        return ErrorRecord(validator.code, validator.name, error)
@@ -0,0 +1,235 @@
+import os
+import gc
+import signal
+import logging
+import argparse
+from queue import SimpleQueue
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+from socketserver import UnixStreamServer
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from lxml import etree
+from .flc import parse_schema, parse_report, sniff_report
+from .errors import dump_errors
+from .cache import ResultCache
+from .prior import SQLitePriorStore
+from .metrics import Metrics
+
+
+class ValidationHandler(BaseHTTPRequestHandler):
+    server_version = 'rosstat-flc'
+
+    def address_string(self):
+        '''Адрес клиента. У Unix сокета адреса нет'''
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return 'unix'
+
+    def log_message(self, format, *args):
+        '''Журнал запросов не ведётся'''
+
+    def do_GET(self):
+        if urlsplit(self.path).path != '/metrics':
+            return self._send(404, '{"error": "Не найдено"}')
+        self._send(200, self.server.metrics.to_openmetrics(),
+                   'application/openmetrics-text; version=1.0.0')
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        try:
+            length = self._get_length()
+            limits = self._get_limits(url.query)
+        except ValueError:
+            return self._send(400, '{"error": "Некорректный запрос"}')
+
+        body = self.rfile.read(length)
+        self.server.metrics.observe_size(len(body))
+
+        try:
+            schema = self.server.get_schema(url.path.strip('/'), body)
+            if schema is None:
+                return self._send(404, '{"error": "Схема не найдена"}')
+            report = parse_report(body)
+        except (etree.XMLSyntaxError, TypeError, IndexError, KeyError,
+                ValueError, AttributeError):
+            return self._send(400, '{"error": "Некорректный отчёт"}')
+
+        errors = schema.validate(report, cache=self.server.cache,
+                                 metrics=self.server.metrics,
+                                 prior=self.server.prior, records=True,
+                                 **limits)
+        if self.server.prior is not None and not errors:
+            self.server.prior.put(schema, report)
+        self._send(200, dump_errors(errors, ensure_ascii=False))
+
+    def _get_length(self):
+        '''Длина тела запроса. ValueError, если она не целое
+           неотрицательное число
+        '''
+        length = int(self.headers.get('Content-Length', 0))
+        if length < 0:
+            raise ValueError(length)
+        return length
+
+    def _get_limits(self, query):
+        '''Лимиты проверки из параметров запроса. ValueError, если кол-во
+           ошибок не целое положительное число, а время не конечное
+           неотрицательное число
+        '''
+        params = parse_qs(query)
+        limits = {}
+        if 'max_errors' in params:
+            limits['max_errors'] = int(params['max_errors'][0])
+            if limits['max_errors'] < 1:
+                raise ValueError(limits['max_errors'])
+        if 'time_budget' in params:
+            limits['time_budget'] = float(params['time_budget'][0])
+            if not 0 <= limits['time_budget'] < float('inf'):
+                raise ValueError(limits['time_budget'])
+        return limits
+
+    def _send(self, status, content, content_type='application/json'):
+        '''Отправка ответа, по умолчанию JSON'''
+        content = content.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class SchemasMixin:
+    def __init__(self, address, schemas, cache=None, prior=None):
+        self.schemas = schemas
+        self.cache = cache
+        self.prior = prior
+        self.metrics = Metrics()
+        self.schemas_codes = {schema.code: schema
+                              for schema in schemas.values() if schema.code}
+        super().__init__(address, ValidationHandler)
+
+    def get_schema(self, name, body):
+        '''Выбор схемы по имени, либо по коду формы из заголовка отчёта'''
+        if name:
+            return self.schemas.get(name)
+
+        header = sniff_report(body)
+        if header is not None:
+            return self.schemas_codes.get(header.code)
+
+
+class ValidationServer(SchemasMixin, HTTPServer):
+    pass
+
+
+class UnixValidationServer(SchemasMixin, UnixStreamServer):
+    pass
+
+
+def load_schemas(paths, **kwargs):
+    '''Загрузка схем. Ключ словаря - имя файла схемы без расширения'''
+    return {Path(path).stem: parse_schema(str(path), **kwargs)
+            for path in paths}
+
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+
+def _start_logging():
+    '''Журнал рабочего процесса. Записи передаются через очередь в поток,
+       выполняющий вывод, чтобы запись в stderr не задерживала проверку
+    '''
+    queue = SimpleQueue()
+    listener = QueueListener(queue, logging.StreamHandler())
+    logger = logging.getLogger('rosstat')
+    logger.handlers[:] = [QueueHandler(queue)]
+    logger.propagate = False
+    listener.start()
+    return listener
+
+
+def serve(server, workers):
+    '''Запуск рабочих процессов, обслуживающих общий сокет сервера.
+       Перед запуском все объекты родителя исключаются из сборки мусора,
+       чтобы сборщик не касался страниц памяти, разделяемых с рабочими
+       процессами. Метрики ведутся каждым процессом отдельно
+    '''
+    gc.collect()
+    gc.freeze()
+    signal.signal(signal.SIGTERM, _terminate)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            listener = _start_logging()
+            try:
+                server.serve_forever()
+            finally:
+                listener.stop()
+                os._exit(0)
+        children.append(pid)
+
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        server.server_close()
+
+
+def create_server(schemas, bind=None, unix=None, cache=None, prior=None):
+    '''Создание сервера на TCP (host:port) или Unix сокете'''
+    if unix is not None:
+        if os.path.exists(unix):
+            os.unlink(unix)
+        return UnixValidationServer(unix, schemas, cache, prior)
+
+    host, port = (bind or '127.0.0.1:8080').rsplit(':', 1)
+    return ValidationServer((host, int(port)), schemas, cache, prior)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m rosstat.server',
+                                     description='Сервер проверки отчётов')
+    parser.add_argument('schemas', nargs='+', help='файлы схем')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='кол-во рабочих процессов')
+    parser.add_argument('--bind', help='адрес host:port, по умолчанию '
+                                       '127.0.0.1:8080')
+    parser.add_argument('--unix', help='путь к Unix сокету')
+    parser.add_argument('--skip-warns', action='store_true',
+                        help='не выводить предупреждения о контролях '
+                             'за прошлый период')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='кол-во результатов проверки, хранимых '
+                             'в памяти каждого процесса')
+    parser.add_argument('--cache-path', help='путь к базе SQLite для '
+                                             'хранения результатов проверки')
+    parser.add_argument('--prior-path', help='путь к базе SQLite с отчётами '
+                                             'для контролей за прошлый период')
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache_size or args.cache_path:
+        cache = ResultCache(args.cache_size, args.cache_path)
+
+    schemas = load_schemas(args.schemas, skip_warns=args.skip_warns)
+    prior = None
+    if args.prior_path:
+        prior = SQLitePriorStore(args.prior_path)
+
+    server = create_server(schemas, args.bind, args.unix, cache, prior)
+    serve(server, args.workers)
+
+
+if __name__ == '__main__':
+    main()
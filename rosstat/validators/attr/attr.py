@@ -15,12 +15,10 @@ class AttrValidator(AbstractValidator):
     def __repr__(self):
         return '<AttrValidator errors={errors}>'.format(**self.__dict__)
 
-    def validate(self, report):
-        self._check_year(report)
-        self._check_match(report)
-        self._check_period(report)
-
-        return not bool(self.errors)
+    def _iter_checks(self, report):
+        yield self._check_year(report)
+        yield self._check_match(report)
+        yield self._check_period(report)
 
     def _check_year(self, report):
         '''Проверка формата года'''
@@ -1,14 +1,85 @@
-from collections import namedtuple
+from time import monotonic
 
-Error = namedtuple('Error', ('description', 'code', 'level'))
+
+class Error:
+    __slots__ = ('_template', '_description', 'args', 'code', 'level')
+
+    def __init__(self, description, code, level=1, args=()):
+        self._template = description
+        self._description = None if args else description
+        self.args = args
+        self.code = code
+        self.level = level
+
+    def __repr__(self):
+        return '<Error code={} level={} description={}>'.format(
+            self.code,
+            self.level,
+            self.description
+        )
+
+    @property
+    def description(self):
+        '''Описание ошибки. Шаблон заполняется при первом обращении'''
+        if self._description is None:
+            self._description = self._render()
+        return self._description
+
+    def _render(self):
+        '''Заполнение шаблона описания аргументами'''
+        return self._template.format(*self.args)
+
+
+class TimeBudgetExceeded(Exception):
+    '''Исчерпан лимит времени на проверку отчёта'''
+
+
+class Deadline:
+    def __init__(self, time_budget=None):
+        self._expires = None
+        if time_budget is not None:
+            self._expires = monotonic() + time_budget
+
+    def __repr__(self):
+        return '<Deadline expires={_expires}>'.format(**self.__dict__)
+
+    def remaining(self):
+        '''Оставшееся время в секундах, либо None если лимита нет'''
+        if self._expires is not None:
+            return max(self._expires - monotonic(), 0)
+
+    def check(self):
+        '''Возбуждает исключение, если лимит времени исчерпан'''
+        if self._expires is not None and monotonic() > self._expires:
+            raise TimeBudgetExceeded()
 
 
 class AbstractValidator:
     def __init__(self, schema):
         self._schema = schema
+        self.errors = []
 
-    def error(self, *args, level=1):
-        self.errors.append(Error(*args, level))
+    def error(self, description, code, *args, level=1):
+        self.errors.append(Error(description, code, level, args))
 
     def validate(self, report):
+        for _ in self.iter_errors(report):
+            pass
+        return not bool(self.errors)
+
+    def iter_errors(self, report, deadline=None):
+        '''Итератор по ошибкам. Ошибки, накопленные на очередном шаге
+           проверки, отдаются сразу по его завершении. Между шагами
+           проверяется лимит времени
+        '''
+        deadline = deadline or Deadline()
+        offset = 0
+        for _ in self._iter_checks(report):
+            yield from self.errors[offset:]
+            offset = len(self.errors)
+            deadline.check()
+        yield from self.errors[offset:]
+
+    def _iter_checks(self, report):
+        '''Генератор шагов проверки'''
         raise NotImplementedError
@@ -1,46 +1,176 @@
-from ..base import AbstractValidator
+import heapq
+import multiprocessing
+from time import perf_counter
+from itertools import chain
+from operator import itemgetter
+from ..base import AbstractValidator, Error, Deadline, TimeBudgetExceeded
 from .exceptions import PrevPeriodNotImpl
 from .inspectors import PeriodInspector, FormulaInspector
 
 
+class ControlFailure(Error):
+    '''Непройденная проверка контроля. Хранит название контроля, значения
+       слева и справа, оператор сравнения
+    '''
+    __slots__ = ()
+
+    template = '{}; слева {} {} справа {} разница {}'
+
+    def __init__(self, code, level, name, left, operator, right):
+        super().__init__(self.template, code, level,
+                         (name, left, operator, right))
+
+    @property
+    def left(self):
+        return self.args[1]
+
+    @property
+    def operator(self):
+        return self.args[2]
+
+    @property
+    def right(self):
+        return self.args[3]
+
+    def _render(self):
+        name, left, operator, right = self.args
+        return self._template.format(name, left, operator, right,
+                                     round(left - right, 2))
+
+
+_worker_state = None
+
+
+def _init_worker(validator, report):
+    '''Инициализация процесса пула. При запуске через fork валидатор
+       и отчёт не сериализуются, а наследуются от родителя
+    '''
+    global _worker_state
+    _worker_state = (validator, report)
+
+
+def _check_chunk(indexes):
+    '''Проверка части контролей в процессе пула. Возвращает для каждого
+       контроля его индекс, найденные ошибки и время проверки
+    '''
+    validator, report = _worker_state
+    results = []
+    for index in indexes:
+        validator.errors, validator.timings = [], []
+        validator._check_control(report, validator._schema.controls[index])
+        results.append((index, validator.errors, validator.timings[0]))
+    return results
+
+
 class ControlValidator(AbstractValidator):
     name = 'Проверка контролей'
     code = '4'
 
-    def __init__(self, schema):
+    def __init__(self, schema, workers=None, prior=None):
         self._schema = schema
+        self._workers = workers or 1
+        self._prior = prior
+        self._previous = None
+        self._deadline = Deadline()
+        self._selections = {}
         self.errors = []
-
-        self._template = ('{control_name}; слева {left} {operator} '
-                          'справа {right} разница {delta}')
+        self.timings = []
 
     def __repr__(self):
         return '<ControlValidator errors={errors}>'.format(**self.__dict__)
 
-    def __fmt_control(self, ctrl, name):
-        '''Форматирование сообщения о непройденном контроле'''
-        return self._template.format(control_name=name, **ctrl)
+    def iter_errors(self, report, deadline=None):
+        self._deadline = deadline or Deadline()
+        return super().iter_errors(report, self._deadline)
 
-    def validate(self, report):
-        self._check_controls(report)
+    def _iter_checks(self, report):
+        self._previous = self.__read_previous(report)
+        if self.__parallel():
+            return self._check_controls_parallel(report)
+        return self._check_controls(report)
 
-        return not bool(self.errors)
+    def __read_previous(self, report):
+        '''Отчёт за прошлый период из хранилища, если он нужен контролям.
+           Разделы для всех контролей читаются один раз до их проверки.
+           Если отчёта в хранилище нет, контроли за прошлый период
+           пропускаются или предупреждают об этом, как без хранилища
+        '''
+        if (self._prior is None or not self._schema.prior_sections
+                or report.blank):
+            return None
+        return self._prior.previous(self._schema, report,
+                                    self._schema.prior_sections)
+
+    def __parallel(self):
+        '''Параллельная проверка возможна, если процессов больше одного,
+           контролей больше, чем процессов, и доступен запуск через fork
+        '''
+        return (self._workers > 1
+                and len(self._schema.controls) > self._workers
+                and 'fork' in multiprocessing.get_all_start_methods())
 
     def _check_controls(self, report):
-        '''Проверка отчёта по контролям'''
+        '''Проверка отчёта по контролям. Выборки ячеек отчёта запоминаются
+           на время проверки и используются всеми контролями
+        '''
+        if report.blank:
+            return
+
+        try:
+            for control in self._schema.controls:
+                yield self._check_control(report, control)
+        finally:
+            self._selections.clear()
+
+    def _check_controls_parallel(self, report):
+        '''Проверка отчёта по контролям в пуле процессов. Контроли делятся
+           между процессами с учётом оценки стоимости, результаты
+           собираются в исходном порядке контролей
+        '''
         if report.blank:
             return
 
-        for control in self._schema.controls:
-            self._check_control(report, control)
+        ctx = multiprocessing.get_context('fork')
+        with ctx.Pool(self._workers, _init_worker, (self, report)) as pool:
+            chunks = pool.map_async(_check_chunk, self._partition(),
+                                    chunksize=1)
+            try:
+                results = chunks.get(self._deadline.remaining())
+            except multiprocessing.TimeoutError:
+                raise TimeBudgetExceeded()
+
+        for index, errors, timing in sorted(chain.from_iterable(results),
+                                            key=itemgetter(0)):
+            self.errors.extend(errors)
+            self.timings.append(timing)
+            yield
+
+    def _partition(self):
+        '''Разбиение индексов контролей на части с близкой суммарной
+           стоимостью. Самые "дорогие" контроли распределяются первыми
+        '''
+        costs = [max(self._schema.controls_cost[control.attrib['id']], 1)
+                 for control in self._schema.controls]
+
+        heap = [(0, worker, []) for worker in range(self._workers)]
+        for index in sorted(range(len(costs)), key=costs.__getitem__,
+                            reverse=True):
+            load, worker, chunk = heapq.heappop(heap)
+            chunk.append(index)
+            heapq.heappush(heap, (load + costs[index], worker, chunk))
+        return [sorted(chunk) for _, _, chunk in heap if chunk]
 
     def _check_control(self, report, control):
-        '''Обёртка для обработки исключения'''
+        '''Обёртка для обработки исключения и замера времени проверки'''
+        start = perf_counter()
         try:
             if self.__check_period(report, control):
                 self.__check_control(report, control)
         except PrevPeriodNotImpl as ex:
             self.error(ex.msg, ex.id, level=0)
+        finally:
+            self.timings.append((control.attrib['id'],
+                                 perf_counter() - start))
 
     def __check_period(self, report, control):
         '''Проверка соответствия периода контроля периоду в отчёте'''
@@ -53,7 +183,11 @@ class ControlValidator(AbstractValidator):
                                      formats=self._schema.formats,
                                      catalogs=self._schema.catalogs,
                                      dimension=self._schema.dimension,
-                                     skip_warns=self._schema.skip_warns)
-        for ctrl in inspector.check(report):
-            message = self.__fmt_control(ctrl, inspector.name)
-            self.error(message, inspector.id, level=inspector.tip)
+                                     skip_warns=self._schema.skip_warns,
+                                     selections=self._selections,
+                                     specifics=self._schema.specifics,
+                                     previous=self._previous)
+        for left, operator, right in inspector.check(report):
+            self.errors.append(ControlFailure(inspector.id, inspector.tip,
+                                              inspector.name,
+                                              left, operator, right))
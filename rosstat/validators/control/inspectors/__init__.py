@@ -1,2 +1,3 @@
 from .period import PeriodInspector
 from .formula import FormulaInspector
+from .cost import CostInspector
@@ -0,0 +1,37 @@
+from .formula import ControlParams
+from ..parser import get_program
+
+
+class CostInspector:
+    def __init__(self, control, *, formats, catalogs, dimension):
+        self.id = control.attrib['id']
+        self.rule = control.attrib['rule'].strip()
+        self.condition = control.attrib['condition'].strip()
+
+        self._params = ControlParams(False,
+                                     formats,
+                                     catalogs,
+                                     dimension,
+                                     None,
+                                     None)
+
+    def __repr__(self):
+        return ('<CostInspector id={id} rule={rule} '
+                'condition={condition}>').format(**self.__dict__)
+
+    def estimate(self):
+        '''Оценка стоимости проверки контроля по его условию и правилу.
+           Формулы, которые не удалось разобрать, и формулы со значениями
+           за прошлый период ничего не стоят, их проверка не выполняется.
+           Стоимость считается по дереву скомпилированной формулы, поэтому
+           при загрузке схемы каждая формула разбирается один раз
+        '''
+        return self._estimate(self.condition) + self._estimate(self.rule)
+
+    def _estimate(self, formula):
+        if not formula or '{{' in formula:
+            return 0
+        program = get_program(formula)
+        if program is None:
+            return 0
+        return program.tree.cost(self._params)
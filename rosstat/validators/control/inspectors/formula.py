@@ -1,6 +1,6 @@
 from itertools import chain
 from collections import namedtuple
-from ..parser import parser
+from ..parser import get_program
 from ..exceptions import (
     ConditionExprError,
     RuleExprError,
@@ -14,7 +14,11 @@ ControlParams = namedtuple('ControlParams', ('is_rule',
                                              'catalogs',
                                              'dimension',
                                              'precision',
-                                             'fault'))
+                                             'fault',
+                                             'selections',
+                                             'specifics',
+                                             'previous'),
+                           defaults=(None, None, None))
 
 
 def wrap_exc(f):
@@ -27,8 +31,12 @@ def wrap_exc(f):
 
 
 class FormulaInspector:
-    def __init__(self, control, *, formats, catalogs, dimension, skip_warns):
+    def __init__(self, control, *, formats, catalogs, dimension, skip_warns,
+                 selections=None, specifics=None, previous=None):
         self._skip_warns = skip_warns
+        self._selections = selections
+        self._specifics = specifics
+        self._previous = previous
 
         self.formats = formats
         self.catalogs = catalogs
@@ -56,16 +64,16 @@ class FormulaInspector:
     def _check_condition(self, report):
         '''Проверка условия для выполнения контроля'''
         if self.condition and not self._is_previous_period(self.condition):
-            evaluator = self.__parse(self.condition, ConditionExprError)
-            return not list(self.__check(report, evaluator, self.__params()))
+            program = self.__parse(self.condition, ConditionExprError)
+            return not list(self.__check(report, program, self.__params()))
         return True
 
     @wrap_exc
     def _check_rule(self, report):
         '''Проверка правила контроля'''
         if self.rule and not self._is_previous_period(self.rule):
-            evaluator = self.__parse(self.rule, RuleExprError)
-            return self.__check(report, evaluator, self.__params(is_rule=True))
+            program = self.__parse(self.rule, RuleExprError)
+            return self.__check(report, program, self.__params(is_rule=True))
         return []
 
     def __params(self, is_rule=False):
@@ -75,26 +83,30 @@ class FormulaInspector:
                              self.catalogs,
                              self.dimension,
                              self.precision,
-                             self.fault if is_rule else float(-1))
+                             self.fault if is_rule else float(-1),
+                             self._selections,
+                             self._specifics,
+                             self._previous)
 
     def __parse(self, formula, exc):
-        '''Парсинг формулы контроля'''
-        evaluator = parser.parse(formula)
-        if evaluator is None:
+        '''Скомпилированная формула контроля'''
+        program = get_program(formula)
+        if program is None:
             raise exc(self.id)
-        return evaluator
+        return program
 
-    def __check(self, report, evaluator, params):
+    def __check(self, report, program, params):
         '''Выполнение проверки. Возвращает список проваленых проверок'''
-        results = evaluator.check(report, params)
+        results = program(report, params)
         return chain.from_iterable(result.controls for result in results)
 
     def _is_previous_period(self, formula):
         '''Проверка наличия в формуле элемента в двух фигурных скобках,
            что говорит о том, что значение берётся за прошлый период.
-           Такой функционал пока неизвестно когда получится реализовать
+           Такая формула проверяется, только если передан отчёт за прошлый
+           период (previous)
         '''
-        if '{{' in formula:
+        if '{{' in formula and self._previous is None:
             if self._skip_warns:
                 return True
             else:
@@ -1 +1,2 @@
-from .parser import parser
+from .frontend import get_parser, set_frontend
+from .compiler import get_program
@@ -0,0 +1,371 @@
+import operator
+from itertools import chain
+from functools import reduce
+from operator import attrgetter, methodcaller
+from .elements import Elem, ElemList, ElemLogic, ElemPrevious, ElemSelector
+from .frontend import get_parser
+from .specific import Specific
+from ..exceptions import NoElemToCompareError, NoFormatForRowError
+from ....helpers import SPEC_KEYS, BoundedMemo
+from ....report import ANY_SPEC, EMPTY_ITER
+
+PROGRAM_MEMO_SIZE = 16384
+
+flatten = chain.from_iterable
+
+
+def _failing(exc_type, message):
+    '''Функция, возбуждающая при вызове то же исключение, что и проверка
+       дерева элементов в этом месте
+    '''
+    def fail(*args):
+        raise exc_type(message)
+    return fail
+
+
+def zip_elems(l_list, r_list):
+    '''Попарное объединение результатов. Короткий список заменяется копиями
+       своего первого элемента по длине длинного, как в ElemList._zip
+    '''
+    if len(l_list) < len(r_list):
+        l_list = [l_list[0].copy() for _ in range(len(r_list))]
+    elif len(l_list) > len(r_list):
+        r_list = [r_list[0].copy() for _ in range(len(l_list))]
+    return zip(l_list, r_list)
+
+
+def _select(selections, selector, read, report, params):
+    '''Выборка ячеек отчёта с запоминанием на время проверки отчёта.
+       Ключ - коды разделов, строк, граф и значения специфик. Запомненные
+       элементы не изменяются, каждый раз возвращаются их копии
+    '''
+    try:
+        elems = selections[selector]
+    except KeyError:
+        try:
+            elems = read(report, params)
+        except NoFormatForRowError:
+            elems = NoFormatForRowError
+        selections[selector] = elems
+
+    if elems is NoFormatForRowError:
+        raise NoFormatForRowError()
+    return [[elem.copy() for elem in row] for row in elems]
+
+
+def _spec_matcher(key, values, default):
+    '''Условие отбора строки по специфике для Section.select. "*" подходит
+       любой строке
+    '''
+    return key, None if values == ANY_SPEC else values, default
+
+
+def _sum_all(report, params, elems):
+    return [[reduce(operator.add, flatten(elems))]]
+
+
+def _sum_columns(report, params, elems):
+    return [[reduce(operator.add, column)] for column in zip(*elems)]
+
+
+def _sum_rows(report, params, elems):
+    return [[reduce(operator.add, row)] for row in elems]
+
+
+def _nullif(results):
+    return [[Elem(None)] if l_elem.val == r_elem.val else [l_elem]
+            for l_elem, r_elem in results]
+
+
+def _coalesce(results):
+    return [next([elem] for elem in line if elem.val is not None)
+            for line in results]
+
+
+class Program:
+    '''Скомпилированная формула. specifics - специфики формулы, которые
+       нужно разворачивать: (разделы, строки, ключ, значения), previous -
+       коды разделов, читаемых из отчёта за прошлый период, tree - дерево
+       элементов, из которого скомпилирована формула
+    '''
+    __slots__ = ('_evaluate', 'specifics', 'previous', 'tree')
+
+    def __init__(self, evaluate, specifics, previous, tree):
+        self._evaluate = evaluate
+        self.specifics = specifics
+        self.previous = previous
+        self.tree = tree
+
+    def __call__(self, report, params):
+        return self._evaluate(report, params)
+
+
+class Compiler:
+    '''Компиляция дерева элементов формулы в замыкания. Цепочки функций,
+       способ суммирования, операторы и неразворачиваемые специфики
+       определяются один раз, проверка отчёта сводится к проходу по его
+       данным. Результат совпадает с методами check дерева, само дерево
+       не изменяется, поэтому функция проверки используется повторно
+    '''
+    def __init__(self):
+        self._specifics = []
+        self._previous = set()
+
+    def compile(self, root):
+        '''Программа проверки формулы: (report, params) -> список
+           элементов
+        '''
+        self._specifics = []
+        self._previous = set()
+        if isinstance(root, ElemLogic):
+            evaluate = self._compile(root, None)
+        else:
+            evaluate = _failing(TypeError, 'formula root is not a comparison')
+        return Program(evaluate, self._specifics, self._previous, root)
+
+    def _compile(self, node, ctx):
+        '''Компиляция узла. ctx - соседний узел, от которого зависит
+           способ суммирования
+        '''
+        if isinstance(node, ElemLogic):
+            return self._logic(node)
+        elif isinstance(node, ElemSelector):
+            return self._selector(node, ctx)
+        elif isinstance(node, ElemList):
+            return self._list(node, ctx)
+        return self._elem(node)
+
+    def _elem(self, node):
+        if not node.func:
+            return lambda report, params: [node.copy()]
+
+        name, right = node.func
+        if right is None:
+            return _failing(AttributeError,
+                            "'NoneType' object has no attribute 'check'")
+        right_fn = self._compile(right, node)
+        op_func = getattr(operator, name, None)
+        if op_func is None:
+            op_func = _failing(AttributeError,
+                               f"module 'operator' has no attribute {name!r}")
+
+        def evaluate(report, params):
+            return [op_func(node.copy(), r_elem)
+                    for r_elem in right_fn(report, params)]
+        return evaluate
+
+    def _list(self, node, ctx):
+        sections, rows, columns = node.sections, node.rows, node.columns
+        previous = isinstance(node, ElemPrevious)
+        selector = (previous, tuple(sections), tuple(rows), tuple(columns),
+                    *(frozenset(getattr(node, key)) for key in SPEC_KEYS))
+        get_specs = self._specs(node)
+        funcs = self._funcs(node, ctx)
+        if previous:
+            self._previous.update(sections)
+
+        def read(report, params):
+            formats, dimensions = params.formats, params.dimension
+            if previous:
+                report = params.previous
+                if report is None:
+                    report = EMPTY_ITER
+            specs = {}
+            elems = []
+            for section in report.iter(sections):
+                def get_row_specs(row_code, section=section):
+                    if not formats.has(section.code, row_code):
+                        raise NoFormatForRowError()
+                    row_specs = specs.get(row_code)
+                    if row_specs is None:
+                        row_specs = specs[row_code] = get_specs(
+                            section.code, row_code, params)
+                    return row_specs
+
+                for row in section.select(rows, get_row_specs):
+                    sec_code = section.code
+                    dimension = dimensions[sec_code]
+                    elems.append([
+                        Elem(col.value, sec_code, row.code, col.code)
+                        for col in row.iter(columns, dimension=dimension)
+                    ])
+            return elems
+
+        def evaluate(report, params):
+            if params.selections is None:
+                elems = read(report, params)
+            else:
+                elems = _select(params.selections, selector, read,
+                                report, params)
+            for func in funcs:
+                elems = func(report, params, elems)
+            return list(flatten(elems))
+        return evaluate
+
+    def _specs(self, node):
+        '''Функция подготовки специфик строки: кортежи (ключ, множество
+           специфик или None для "*", значение по умолчанию). Специфики,
+           которые не нужно разворачивать, готовятся один раз, остальные
+           берутся из развёрнутых специфик схемы
+        '''
+        specs, expand = [], []
+        for key in SPEC_KEYS:
+            spec = Specific(key, getattr(node, key))
+            if spec.need_expand():
+                pattern = frozenset(spec)
+                expand.append((len(specs), key, pattern))
+                self._specifics.append((tuple(node.sections),
+                                        tuple(node.rows), key, pattern))
+            specs.append(_spec_matcher(key, frozenset(spec), None))
+
+        if not expand:
+            return lambda sec_code, row_code, params: specs
+
+        def get_specs(sec_code, row_code, params):
+            result = list(specs)
+            for index, key, pattern in expand:
+                if params.specifics is None:
+                    values, default = Specific(key, pattern).resolve(
+                        sec_code, row_code, params.formats, params.catalogs)
+                else:
+                    values, default = params.specifics.get(
+                        sec_code, row_code, key, pattern)
+                result[index] = _spec_matcher(key, values, default)
+            return result
+        return get_specs
+
+    def _selector(self, node, ctx):
+        child_fns = [self._compile(elem, ctx) for elem in node.elems]
+        select = {'nullif': _nullif, 'coalesce': _coalesce}[node.action]
+        funcs = self._funcs(node, ctx)
+
+        def evaluate(report, params):
+            elems = select(zip_elems(*[child_fn(report, params)
+                                       for child_fn in child_fns]))
+            for func in funcs:
+                elems = func(report, params, elems)
+            return list(flatten(elems))
+        return evaluate
+
+    def _logic(self, node):
+        l_fn = self._compile(node.l_elem, node.r_elem)
+        r_fn = self._compile(node.r_elem, node.l_elem)
+        methods = [getattr(Elem, name, None) or methodcaller(name)
+                   for name, _ in node.funcs]
+        op_func, op_name = node.op_func, node.op_name
+        get_value = attrgetter(node.elem_type)
+        is_or = op_name == 'or'
+
+        def evaluate(report, params):
+            l_elems = l_fn(report, params)
+            r_elems = r_fn(report, params)
+            if not (l_elems and r_elems):
+                raise NoElemToCompareError()
+
+            for method in methods:
+                for elem in l_elems:
+                    method(elem)
+
+            precision, fault = params.precision, params.fault
+            elems = []
+            for l_elem, r_elem in zip_elems(l_elems, r_elems):
+                l_elem.round(precision)
+                r_elem.round(precision)
+                success = (op_func(get_value(l_elem), get_value(r_elem))
+                           or abs(l_elem.val - r_elem.val) <= fault)
+
+                if is_or:
+                    if l_elem.controls:
+                        l_elem.controls.clear()
+                    else:
+                        r_elem.controls.clear()
+                if not success:
+                    l_elem.controls.append((l_elem.val, op_name, r_elem.val))
+                l_elem.val = r_elem.val
+                l_elem.controls.extend(r_elem.controls)
+                elems.append(l_elem)
+            return elems
+        return evaluate
+
+    # ---
+
+    def _funcs(self, node, ctx):
+        '''Цепочка функций элемента: (report, params, elems) -> elems'''
+        return [self._func(node, ctx, name, args) for name, args in node.funcs]
+
+    def _func(self, node, ctx, name, args):
+        if name == 'sum':
+            return self._sum(node, ctx)
+        elif name in ('abs', 'floor'):
+            return self._unary(getattr(Elem, name))
+        elif name in ('round', 'isnull'):
+            return self._binary(node, getattr(Elem, name), args)
+        return self._math(node, getattr(operator, name), *args)
+
+    def _sum(self, node, ctx):
+        '''Способ суммирования определяется соседним узлом, как
+           в ElemList._apply_sum
+        '''
+        if isinstance(ctx, ElemLogic):
+            return _sum_all
+        try:
+            if node.columns == ctx.columns:
+                return _sum_columns
+            elif node.rows == ctx.rows:
+                return _sum_rows
+        except AttributeError as ex:
+            return _failing(AttributeError, str(ex))
+
+        def sum_cells(report, params, elems):
+            if not elems:
+                return [[Elem(None, node.sections[0], '*', '*')]]
+            return _sum_all(report, params, elems)
+        return sum_cells
+
+    def _unary(self, method):
+        def apply(report, params, elems):
+            for row in elems:
+                for elem in row:
+                    method(elem)
+            return elems
+        return apply
+
+    def _binary(self, node, method, args):
+        arg_fns = [self._compile(arg, node) for arg in args]
+
+        def apply(report, params, elems):
+            values = [int(arg_fn(report, params)[0].val)
+                      for arg_fn in arg_fns]
+            for row in elems:
+                for elem in row:
+                    method(elem, *values)
+            return elems
+        return apply
+
+    def _math(self, node, op_func, right):
+        right_fn = self._compile(right, node)
+
+        def apply(report, params, elems):
+            left = list(flatten(elems))
+            return [[op_func(l_elem, r_elem)]
+                    for l_elem, r_elem in zip(left, right_fn(report, params))]
+        return apply
+
+
+_programs = BoundedMemo(PROGRAM_MEMO_SIZE)
+
+
+def get_program(formula):
+    '''Скомпилированная формула, либо None, если формула не разобрана.
+       Программы не хранят состояния и разделяются между потоками
+       и схемами
+    '''
+    try:
+        return _programs[formula]
+    except KeyError:
+        pass
+
+    evaluator = get_parser().parse(formula)
+    program = None if evaluator is None else Compiler().compile(evaluator)
+    _programs[formula] = program
+    return program
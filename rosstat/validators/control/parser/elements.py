@@ -6,6 +6,7 @@ from .value import nullablefloat
 from .specific import Specific
 from ..exceptions import NoElemToCompareError, NoFormatForRowError
 from ....helpers import SPEC_KEYS
+from ....report import EMPTY_ITER
 
 OPERATOR_MAP = {
     '<': operator.lt,
@@ -77,6 +78,24 @@ class Elem:
     def controls(self):
         return self._controls
 
+    @property
+    def func(self):
+        return self._func
+
+    def copy(self):
+        '''Копия элемента. Значение неизменяемо, поэтому копируются только
+           множества кодов и список контролей
+        '''
+        elem = Elem.__new__(Elem)
+        elem.section = set(self.section)
+        elem.rows = set(self.rows)
+        elem.columns = set(self.columns)
+        elem._controls = list(self._controls)
+        elem._func = self._func
+        elem.bool = self.bool
+        elem.val = self.val
+        return elem
+
     def controls_clear(self):
         '''Очищение списка контролей'''
         self._controls.clear()
@@ -86,13 +105,10 @@ class Elem:
         self._controls.extend(r_elem._controls)
 
     def controls_append(self, r_elem, op_name):
-        '''Форматирование и добавление непройденного контроля'''
-        self._controls.append({
-            'left': self.val,
-            'operator': op_name,
-            'right': r_elem.val,
-            'delta': round(self.val - r_elem.val, 2)
-        })
+        '''Добавление непройденного контроля. Сохраняются только значения
+           и оператор, сообщение формируется при обращении к ошибке
+        '''
+        self._controls.append((self.val, op_name, r_elem.val))
 
     def check(self, report, params, ctx_elem):
         if self._func:
@@ -130,6 +146,12 @@ class Elem:
         '''Добавляем функцию элементу при парсинге'''
         self._func = (func, arg)
 
+    def cost(self, params):
+        '''Оценка стоимости вычисления элемента'''
+        if self._func and self._func[1] is not None:
+            return 1 + self._func[1].cost(params)
+        return 1
+
 
 class ElemList:
     def __init__(self, sections, rows, columns, s1='*', s2='*', s3='*'):
@@ -298,6 +320,66 @@ class ElemList:
         '''Добавляем функцию в "очередь" при парсинге'''
         self.funcs.append((func, args))
 
+    def cost(self, params):
+        '''Оценка стоимости вычисления элемента. Складывается из кол-ва
+           читаемых ячеек, развёртывания специфик и применения функций
+        '''
+        cells, cost = 0, 0
+        for sec_code in self.__cost_codes(self.sections, params.formats):
+            rows_formats = params.formats.get(sec_code, {})
+            rows = self.__cost_codes(self.rows, rows_formats, ('specs',))
+            columns = self.__cost_codes(self.columns,
+                                        params.dimension.get(sec_code, []))
+            cells += len(rows) * max(len(columns), 1)
+            for row_code in rows:
+                cost += self.__cost_specs(sec_code, row_code, params)
+        return cost + cells + self._cost_funcs(params, cells)
+
+    def __cost_codes(self, codes, known, exclude=()):
+        '''Коды элементов с учётом "*"'''
+        if codes == ['*']:
+            return [code for code in known if code not in exclude]
+        return codes
+
+    def __cost_specs(self, sec_code, row_code, params):
+        '''Стоимость развёртывания специфик. Диапазон требует поиска
+           границ в справочнике
+        '''
+        cost = 0
+        for key in SPEC_KEYS:
+            spec = Specific(key, getattr(self, key))
+            if not spec.need_expand():
+                continue
+            for value in spec:
+                if '-' in value:
+                    cost += len(spec.catalog(sec_code, row_code, params))
+                else:
+                    cost += 1
+        return cost
+
+    def _cost_funcs(self, params, cells):
+        '''Стоимость применения функций. Каждая функция проходит по всем
+           элементам и вычисляет свои аргументы
+        '''
+        cost = 0
+        for _, args in self.funcs:
+            cost += cells
+            cost += sum(arg.cost(params) for arg in args if arg is not None)
+        return cost
+
+
+class ElemPrevious(ElemList):
+    '''Ячейки отчёта за прошлый период (элемент в двух фигурных скобках).
+       Значения читаются из params.previous, без него элементов нет
+    '''
+    def __repr__(self):
+        return '<ElemPrevious' + super().__repr__()[len('<ElemList'):]
+
+    def _read_data(self, report, params):
+        previous = params.previous
+        super()._read_data(EMPTY_ITER if previous is None else previous,
+                           params)
+
 
 class ElemLogic(ElemList):
     def __init__(self, l_elem, operator, r_elem):
@@ -391,6 +473,11 @@ class ElemLogic(ElemList):
         '''Проверка погрешности'''
         return abs(l_elem.val - r_elem.val) <= self.params.fault
 
+    def cost(self, params):
+        '''Оценка стоимости вычисления элемента'''
+        cost = self.l_elem.cost(params) + self.r_elem.cost(params)
+        return cost + self._cost_funcs(params, 1)
+
 
 class ElemSelector(ElemList):
     def __init__(self, action, elems):
@@ -405,6 +492,11 @@ class ElemSelector(ElemList):
             self.elems
         )
 
+    def cost(self, params):
+        '''Оценка стоимости вычисления элемента'''
+        cost = sum(elem.cost(params) for elem in self.elems)
+        return cost + self._cost_funcs(params, 1)
+
     def check(self, *args):
         self._select(args)
         self._apply_funcs(*args)
@@ -0,0 +1,33 @@
+import threading
+from .parser import FormulaParser
+from .pratt import PrattParser
+
+FRONTENDS = {'ply': FormulaParser, 'pratt': PrattParser}
+
+_local = threading.local()
+_frontend = 'ply'
+
+
+def set_frontend(name):
+    '''Выбор парсера формул: "ply" (по умолчанию) или "pratt"'''
+    global _frontend
+    if name not in FRONTENDS:
+        raise ValueError(f'Unknown formula parser {name!r}, '
+                         f'expected one of {sorted(FRONTENDS)}')
+    _frontend = name
+
+
+def get_parser(frontend=None):
+    '''Парсер формул текущего потока. По умолчанию - выбранный
+       через set_frontend
+    '''
+    name = frontend or _frontend
+    try:
+        parsers = _local.parsers
+    except AttributeError:
+        parsers = _local.parsers = {}
+
+    parser = parsers.get(name)
+    if parser is None:
+        parser = parsers[name] = FRONTENDS[name]()
+    return parser
@@ -1,6 +1,10 @@
+import sys
+import logging
 from re import IGNORECASE, DOTALL
 import ply.lex as lex
 
+logger = logging.getLogger(__name__)
+
 reserved = ['SUM', 'ABS', 'FLOOR', 'ROUND', 'ISNULL', 'NULLIF', 'COALESCE']
 literals = [',', '+', '-', '/', '*', '(', ')', '{', '}']
 tokens = ['CODE', 'LOGIC', 'NUM', 'COMP'] + reserved
@@ -17,15 +21,20 @@ def _range(rng):
     return (str(i) for i in range(int(start), int(end) + 1))
 
 
-def t_CODE(t):
-    r'\[.+?\]'
+def read_code(text):
+    '''Разбор координаты вида "[1,3-5]" в список кодов'''
     code = []
-    for i in map(lambda i: i.strip(), t.value[1:-1].split(',')):
+    for i in map(lambda i: i.strip(), text[1:-1].split(',')):
         if ('-' in i) and ('.' not in i):
             code.extend(_range(i))
         else:
             code.append(i)
-    t.value = code
+    return code
+
+
+def t_CODE(t):
+    r'\[.+?\]'
+    t.value = read_code(t.value)
     return t
 
 
@@ -48,8 +57,10 @@ def t_newline(t):
 
 
 def t_error(t):
-    print(f"Illegal character '{t.value[0]}'")
+    logger.warning('Illegal character %r', t.value[0])
     t.lexer.skip(1)
 
 
-lexer = lex.lex(reflags=IGNORECASE | DOTALL)
+def build_lexer():
+    '''Построение лексера формул'''
+    return lex.lex(module=sys.modules[__name__], reflags=IGNORECASE | DOTALL)
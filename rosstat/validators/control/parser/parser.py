@@ -1,6 +1,13 @@
+import os
+import sys
+import copy
+import logging
+import threading
 import ply.yacc as yacc
-from .lexer import tokens
-from .elements import ElemLogic, ElemSelector, ElemList, Elem
+from .lexer import tokens, build_lexer
+from .elements import ElemLogic, ElemSelector, ElemList, ElemPrevious, Elem
+
+logger = logging.getLogger(__name__)
 
 precedence = (
     ('left', 'LOGIC'),
@@ -67,6 +74,11 @@ def p_elem(p):
     p[0] = ElemList(*p[2])
 
 
+def p_elem_previous(p):
+    '''elem : '{' '{' coords '}' '}' '''
+    p[0] = ElemPrevious(*p[3])
+
+
 def p_coord(p):
     '''coords : CODE'''
     p[0] = [p[1]]
@@ -101,7 +113,58 @@ def p_elem_parens(p):
 
 
 def p_error(p):
-    print('Unexpected token:', p)
+    logger.warning('Unexpected token: %s', p)
+
+
+TABMODULE = 'parsetab'
+
+_lock = threading.Lock()
+_prototype = None
+
+
+def build_parser(write_tables=False, outputdir=None, tabmodule=TABMODULE):
+    '''Построение парсера. Таблицы разбора читаются из поставляемого
+       модуля parsetab, если они соответствуют грамматике, иначе строятся
+       заново в памяти
+    '''
+    return yacc.yacc(module=sys.modules[__name__], tabmodule=tabmodule,
+                     outputdir=outputdir, write_tables=write_tables,
+                     debug=False)
+
+
+def write_tables(outputdir):
+    '''Генерация модуля parsetab с таблицами разбора в указанном каталоге.
+       Таблицы строятся заново, даже если модуль уже существует
+    '''
+    build_parser(write_tables=True, outputdir=outputdir,
+                 tabmodule=f'_{TABMODULE}')
+
+    source = os.path.join(outputdir, f'_{TABMODULE}.py')
+    with open(source) as tables:
+        content = tables.read().replace(f'# _{TABMODULE}.py',
+                                        f'# {TABMODULE}.py', 1)
+    with open(os.path.join(outputdir, f'{TABMODULE}.py'), 'w') as tables:
+        tables.write(content)
+    os.remove(source)
+
+
+def _get_prototype():
+    '''Парсер и лексер, строятся при первом обращении'''
+    global _prototype
+    with _lock:
+        if _prototype is None:
+            _prototype = (build_parser(), build_lexer())
+    return _prototype
+
 
+class FormulaParser:
+    '''Парсер формул с собственными лексером и стеками разбора. Таблицы
+       разбора разделяются со всеми экземплярами и не изменяются
+    '''
+    def __init__(self):
+        parser, lexer = _get_prototype()
+        self._parser = copy.copy(parser)
+        self._lexer = lexer.clone()
 
-parser = yacc.yacc()
+    def parse(self, formula):
+        return self._parser.parse(formula, lexer=self._lexer)
@@ -0,0 +1,53 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = "leftLOGICleftCOMPleft+-left*/left,leftCOALESCENULLIFISNULLROUNDSUMABSFLOORleft()rightUMINUSABS COALESCE CODE COMP FLOOR ISNULL LOGIC NULLIF NUM ROUND SUMelem : elem COMP elem\n            | elem LOGIC elemelem : COALESCE elems\n            | NULLIF elemselem : ABS elem\n            | SUM elem\n            | FLOOR elemelem : ISNULL elems\n            | ROUND elemselem : elem '+' elem\n            | elem '-' elem\n            | elem '*' elem\n            | elem '/' elemelem : NUMelem : '{' coords '}' elem : '{' '{' coords '}' '}' coords : CODEcoords : coords CODEelems : elem ',' elemelems : elems ',' elemelem : '-' elem %prec UMINUSelem : '(' elem ')'\n       elems : '(' elems ')' "
+    
+_lr_action_items = {'COALESCE':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[2,2,2,2,2,2,2,2,2,2,2,2,2,2,2,2,2,2,2,]),'NULLIF':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[3,3,3,3,3,3,3,3,3,3,3,3,3,3,3,3,3,3,3,]),'ABS':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,]),'SUM':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,]),'FLOOR':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,]),'ISNULL':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,]),'ROUND':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,]),'NUM':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,]),'{':([0,2,3,4,5,6,7,8,9,11,12,13,14,15,16,17,18,21,39,40,],[11,11,11,11,11,11,11,11,11,29,11,11,11,11,11,11,11,11,11,11,]),'-':([0,1,2,3,4,5,6,7,8,9,10,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,32,33,34,35,36,37,38,39,40,42,44,46,47,48,49,51,],[9,16,9,9,9,9,9,9,9,9,-14,9,9,9,9,9,9,9,-3,16,9,-4,-5,-6,-7,-8,-9,-21,16,16,16,-10,-11,-12,-13,9,9,16,-15,-22,-20,-19,-23,-16,]),'(':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[12,21,21,12,12,12,21,21,12,12,12,12,12,12,12,12,21,12,12,]),'$end':([1,10,19,22,23,24,25,26,27,28,33,34,35,36,37,38,44,46,47,48,49,51,],[0,-14,-3,-4,-5,-6,-7,-8,-9,-21,-1,-2,-10,-11,-12,-13,-15,-22,-20,-19,-23,-16,]),'COMP':([1,10,19,20,22,23,24,25,26,27,28,32,33,34,35,36,37,38,42,44,46,47,48,49,51,],[13,-14,-3,13,-4,-5,-6,-7,-8,-9,-21,13,-1,13,-10,-11,-12,-13,13,-15,-22,-20,-19,-23,-16,]),'LOGIC':([1,10,19,20,22,23,24,25,26,27,28,32,33,34,35,36,37,38,42,44,46,47,48,49,51,],[14,-14,-3,14,-4,-5,-6,-7,-8,-9,-21,14,-1,-2,-10,-11,-12,-13,14,-15,-22,-20,-19,-23,-16,]),'+':([1,10,19,20,22,23,24,25,26,27,28,32,33,34,35,36,37,38,42,44,46,47,48,49,51,],[15,-14,-3,15,-4,-5,-6,-7,-8,-9,-21,15,15,15,-10,-11,-12,-13,15,-15,-22,-20,-19,-23,-16,]),'*':([1,10,19,20,22,23,24,25,26,27,28,32,33,34,35,36,37,38,42,44,46,47,48,49,51,],[17,-14,-3,17,-4,-5,-6,-7,-8,-9,-21,17,17,17,17,17,-12,-13,17,-15,-22,-20,-19,-23,-16,]),'/':([1,10,19,20,22,23,24,25,26,27,28,32,33,34,35,36,37,38,42,44,46,47,48,49,51,],[18,-14,-3,18,-4,-5,-6,-7,-8,-9,-21,18,18,18,18,18,-12,-13,18,-15,-22,-20,-19,-23,-16,]),',':([10,19,20,22,23,24,25,26,27,28,33,34,35,36,37,38,41,42,44,46,47,48,49,51,],[-14,-3,40,-4,-5,-6,-7,-8,-9,-21,-1,-2,-10,-11,-12,-13,39,40,-15,-22,-20,-19,-23,-16,]),')':([10,19,22,23,24,25,26,27,28,32,33,34,35,36,37,38,41,42,44,46,47,48,49,51,],[-14,-3,-4,-5,-6,-7,-8,-9,-21,46,-1,-2,-10,-11,-12,-13,49,46,-15,-22,-20,-19,-23,-16,]),'CODE':([11,29,30,31,43,45,],[31,31,45,-17,45,-18,]),'}':([30,31,43,45,50,],[44,-17,50,-18,51,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'elem':([0,2,3,4,5,6,7,8,9,12,13,14,15,16,17,18,21,39,40,],[1,20,20,23,24,25,20,20,28,32,33,34,35,36,37,38,42,47,48,]),'elems':([2,3,7,8,21,],[19,22,26,27,41,]),'coords':([11,29,],[30,43,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> elem","S'",1,None,None,None),
+  ('elem -> elem COMP elem','elem',3,'p_elem_logic','parser.py',32),
+  ('elem -> elem LOGIC elem','elem',3,'p_elem_logic','parser.py',33),
+  ('elem -> COALESCE elems','elem',2,'p_elem_selector','parser.py',38),
+  ('elem -> NULLIF elems','elem',2,'p_elem_selector','parser.py',39),
+  ('elem -> ABS elem','elem',2,'p_elem_func','parser.py',44),
+  ('elem -> SUM elem','elem',2,'p_elem_func','parser.py',45),
+  ('elem -> FLOOR elem','elem',2,'p_elem_func','parser.py',46),
+  ('elem -> ISNULL elems','elem',2,'p_elem_func_args','parser.py',52),
+  ('elem -> ROUND elems','elem',2,'p_elem_func_args','parser.py',53),
+  ('elem -> elem + elem','elem',3,'p_elem_math','parser.py',59),
+  ('elem -> elem - elem','elem',3,'p_elem_math','parser.py',60),
+  ('elem -> elem * elem','elem',3,'p_elem_math','parser.py',61),
+  ('elem -> elem / elem','elem',3,'p_elem_math','parser.py',62),
+  ('elem -> NUM','elem',1,'p_elem_num','parser.py',68),
+  ('elem -> { coords }','elem',3,'p_elem','parser.py',73),
+  ('elem -> { { coords } }','elem',5,'p_elem_previous','parser.py',78),
+  ('coords -> CODE','coords',1,'p_coord','parser.py',83),
+  ('coords -> coords CODE','coords',2,'p_coords','parser.py',88),
+  ('elems -> elem , elem','elems',3,'p_elem_group','parser.py',94),
+  ('elems -> elems , elem','elems',3,'p_elem_groups','parser.py',99),
+  ('elem -> - elem','elem',2,'p_elem_ne','parser.py',105),
+  ('elem -> ( elem )','elem',3,'p_elem_parens','parser.py',110),
+  ('elems -> ( elems )','elems',3,'p_elem_parens','parser.py',111),
+]
@@ -0,0 +1,209 @@
+import re
+from .lexer import reserved, literals, t_ignore, read_code
+from .parser import FormulaParser, op_name
+from .elements import ElemLogic, ElemSelector, ElemList, ElemPrevious, Elem
+from ....helpers import BoundedMemo
+
+TOKEN_RE = re.compile(r'(\[.+?\])|(\d+(?:\.\d+)?)|(\w+)|(\n+)|([><=]{1,2})',
+                      re.IGNORECASE | re.DOTALL)
+
+RESERVED = {r.lower(): r for r in reserved}
+
+# Приоритеты бинарных операторов и контекстов разбора, как в грамматике
+# PLY (parser.precedence). Элементы списка после запятой и аргументы
+# функций с одним аргументом не продолжаются бинарными операторами
+BINARY = {'LOGIC': 1, 'COMP': 2, '+': 3, '-': 3, '*': 4, '/': 4}
+ITEM, FUNC, UMINUS = 5, 6, 8
+
+END = ('$end', None)
+
+CODE_MEMO_SIZE = 4096
+
+
+class ParseError(Exception):
+    '''Формула не разобрана, разбор передаётся парсеру PLY'''
+
+
+class Lexer:
+    '''Лексер формул, повторяющий правила lexer.py. Развёрнутые диапазоны
+       координат запоминаются
+    '''
+    def __init__(self):
+        self._codes = BoundedMemo(CODE_MEMO_SIZE)
+
+    def tokenize(self, formula):
+        tokens = []
+        pos, end = 0, len(formula)
+        while pos < end:
+            char = formula[pos]
+            if char in t_ignore:
+                pos += 1
+                continue
+
+            match = TOKEN_RE.match(formula, pos)
+            if match is None:
+                if char not in literals:
+                    raise ParseError()
+                tokens.append((char, char))
+                pos += 1
+                continue
+
+            pos = match.end()
+            kind, text = match.lastindex, match.group(match.lastindex)
+            if kind == 1:
+                tokens.append(('CODE', self._read_code(text)))
+            elif kind == 2:
+                tokens.append(('NUM', float(text)))
+            elif kind == 3:
+                text = text.lower()
+                tokens.append((RESERVED.get(text, 'LOGIC'), text))
+            elif kind == 5:
+                tokens.append(('COMP', text))
+        tokens.append(END)
+        return tokens
+
+    def _read_code(self, text):
+        '''Список кодов координаты. Каждый раз возвращается новый список'''
+        try:
+            code = self._codes[text]
+        except KeyError:
+            code = self._codes[text] = tuple(read_code(text))
+        return list(code)
+
+
+class PrattParser:
+    '''Парсер формул методом Пратта. Строит то же дерево элементов, что
+       и грамматика PLY. Формулы с синтаксическими ошибками и недопустимыми
+       символами разбираются парсером PLY с его восстановлением после
+       ошибок и журналированием
+    '''
+    def __init__(self):
+        self._lexer = Lexer()
+        self._fallback = None
+        self._tokens = None
+        self._pos = 0
+
+    def parse(self, formula):
+        try:
+            self._tokens = self._lexer.tokenize(formula)
+            self._pos = 0
+            elem = self._expr(0)
+            self._expect('$end')
+            return elem
+        except ParseError:
+            return self._parse_fallback(formula)
+        finally:
+            self._tokens = None
+
+    def _parse_fallback(self, formula):
+        if self._fallback is None:
+            self._fallback = FormulaParser()
+        return self._fallback.parse(formula)
+
+    # ---
+
+    def _peek(self):
+        return self._tokens[self._pos][0]
+
+    def _next(self):
+        token = self._tokens[self._pos]
+        self._pos += 1
+        return token
+
+    def _expect(self, kind):
+        if self._tokens[self._pos][0] != kind:
+            raise ParseError()
+        return self._next()[1]
+
+    # ---
+
+    def _expr(self, min_prec):
+        '''Элемент с бинарными операторами приоритета выше min_prec'''
+        return self._infix(self._prefix(), min_prec)
+
+    def _infix(self, left, min_prec):
+        while True:
+            kind, value = self._tokens[self._pos]
+            prec = BINARY.get(kind)
+            if prec is None or prec <= min_prec:
+                return left
+
+            self._pos += 1
+            right = self._expr(prec)
+            if kind in ('COMP', 'LOGIC'):
+                left = ElemLogic(left, value, right)
+            else:
+                left.add_func(op_name[kind], right)
+
+    def _prefix(self):
+        kind, value = self._next()
+        if kind == 'NUM':
+            return Elem(value)
+        elif kind == '{':
+            previous = self._peek() == '{'
+            if previous:
+                self._next()
+            coords = [self._expect('CODE')]
+            while self._peek() == 'CODE':
+                coords.append(self._next()[1])
+            self._expect('}')
+            if previous:
+                self._expect('}')
+                return ElemPrevious(*coords)
+            return ElemList(*coords)
+        elif kind == '(':
+            elem = self._expr(0)
+            self._expect(')')
+            return elem
+        elif kind == '-':
+            return -self._expr(UMINUS)
+        elif kind in ('ABS', 'SUM', 'FLOOR'):
+            elem = self._expr(FUNC)
+            elem.add_func(value, None)
+            return elem
+        elif kind in ('ISNULL', 'ROUND'):
+            elem, *args = self._elems()
+            elem.add_func(value, *args)
+            return elem
+        elif kind in ('COALESCE', 'NULLIF'):
+            return ElemSelector(value, self._elems())
+        raise ParseError()
+
+    def _elems(self):
+        '''Список аргументов функции: не меньше двух элементов через
+           запятую, либо список в скобках
+        '''
+        kind, value = self._sequence(parens=False)
+        if kind != 'elems':
+            raise ParseError()
+        return value
+
+    def _sequence(self, parens):
+        '''Элемент или список элементов. Первый элемент списка может быть
+           любым выражением, следующие - без бинарных операторов. Без скобок
+           в списке не больше двух элементов. Вложенные списки в скобках
+           объединяются
+        '''
+        if self._peek() == '(':
+            self._next()
+            kind, value = self._sequence(parens=True)
+            self._expect(')')
+            if kind == 'elems':
+                return 'elems', self._sequence_tail(value, parens)
+            first = self._infix(value, 0)
+        else:
+            first = self._expr(0)
+
+        if self._peek() != ',':
+            return 'elem', first
+
+        self._next()
+        items = [first, self._expr(ITEM)]
+        return 'elems', self._sequence_tail(items, parens)
+
+    def _sequence_tail(self, items, parens):
+        '''Продолжение списка в скобках'''
+        while parens and self._peek() == ',':
+            self._next()
+            items.append(self._expr(ITEM))
+        return items
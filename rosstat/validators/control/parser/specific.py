@@ -1,3 +1,6 @@
+from ....helpers import EMPTY_CATALOG
+
+
 class Specific:
     def __init__(self, key, specs):
         self._key = key
@@ -31,11 +34,26 @@ class Specific:
         '''Основной метод подготовки спефик. Получение формата,
            каталога и развертывание.
         '''
-        formats = self.__get_spec_formats(params.formats, sec_code, row_code)
-        catalog = self.__get_spec_catalog(params.catalogs, formats)
+        specs, self._default = self.resolve(sec_code, row_code,
+                                            params.formats, params.catalogs)
+        self._specs = set(specs)
 
-        self._default = formats.get('default')
-        self._specs = set(self._expand(catalog))
+    def resolve(self, sec_code, row_code, formats, catalogs):
+        '''Развёрнутые специфики и значение по умолчанию для указанных
+           раздела и строки. Сама специфика не изменяется
+        '''
+        formats = self.__get_spec_formats(formats, sec_code, row_code)
+        catalog = self.__get_spec_catalog(catalogs, formats)
+        return frozenset(self._expand(catalog)), formats.get('default')
+
+    def catalog(self, sec_code, row_code, params):
+        '''Возвращает справочник специфики для указанных раздела и строки'''
+        try:
+            formats = self.__get_spec_formats(params.formats, sec_code,
+                                              row_code)
+        except KeyError:
+            return EMPTY_CATALOG
+        return self.__get_spec_catalog(params.catalogs, formats)
 
     def __get_spec_formats(self, formats, sec_code, row_code):
         '''Определяем параметры для специфики указанной строки, раздела'''
@@ -43,7 +61,7 @@ class Specific:
 
     def __get_spec_catalog(self, catalogs, params):
         '''Выбираем список специфик по имени справочника из параметров'''
-        return catalogs.get(params.get('dic'), {}).get('ids', [])
+        return catalogs.get(params.get('dic'), EMPTY_CATALOG)
 
     def _expand(self, dic):
         '''Перебираем специфики. Простые специфики сразу возвращаем. Если
@@ -54,8 +72,54 @@ class Specific:
         for spec in self._specs:
             if '-' in spec:
                 start, end = spec.split('-')
-                for i in range(dic.index(start.strip()),
-                               dic.index(end.strip()) + 1):
-                    yield dic[i]
+                yield from dic.range(start.strip(), end.strip())
             else:
                 yield spec
+
+
+class ExpandedSpecifics:
+    '''Развёрнутые специфики формул контролей схемы. Ключ - раздел,
+       строка, ключ специфики и её значения из формулы
+    '''
+    def __init__(self, formats, catalogs):
+        self._formats = formats
+        self._catalogs = catalogs
+        self._expanded = {}
+
+    def __repr__(self):
+        return '<ExpandedSpecifics size={}>'.format(len(self._expanded))
+
+    def get(self, sec_code, row_code, key, specs):
+        '''Развёрнутые специфики (frozenset) и значение по умолчанию'''
+        cache_key = (sec_code, row_code, key, specs)
+        try:
+            return self._expanded[cache_key]
+        except KeyError:
+            pass
+
+        expanded = Specific(key, specs).resolve(sec_code, row_code,
+                                                self._formats, self._catalogs)
+        self._expanded[cache_key] = expanded
+        return expanded
+
+    def prepare(self, specifics):
+        '''Развёртывание специфик формул заранее. specifics - кортежи
+           (разделы, строки, ключ, значения). Специфики, которые не удалось
+           развернуть, пропускаются: ошибка возникнет при проверке отчёта
+        '''
+        for sections, rows, key, specs in specifics:
+            for sec_code in self.__codes(sections, self._formats):
+                rows_formats = self._formats.get(sec_code, {})
+                for row_code in self.__codes(rows, rows_formats):
+                    if not self._formats.has(sec_code, row_code):
+                        continue
+                    try:
+                        self.get(sec_code, row_code, key, specs)
+                    except (KeyError, ValueError):
+                        pass
+
+    def __codes(self, codes, known):
+        '''Коды разделов или строк с учётом "*"'''
+        if codes == ('*',):
+            return [code for code in known if code != 'specs']
+        return codes
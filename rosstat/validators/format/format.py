@@ -1,5 +1,4 @@
 from ..base import AbstractValidator
-from .inspectors import ValueInspector, SpecInspector
 from .exceptions import (FormatError, DuplicateError, EmptyRowError,
                          EmptyColumnError, NoSectionReportError,
                          NoSectionTemplateError, NoRuleError)
@@ -16,17 +15,15 @@ class FormatValidator(AbstractValidator):
     def __repr__(self):
         return '<FormatValidator errors={errors}>'.format(**self.__dict__)
 
-    def validate(self, report):
+    def _iter_checks(self, report):
         try:
-            self._check_sections(report)
-            self._check_duplicates(report)
-            self._check_required(report)
-            self._check_format(report)
+            yield self._check_sections(report)
+            yield self._check_duplicates(report)
+            yield from self._check_required(report)
+            yield from self._check_format(report)
         except FormatError as ex:
             self.error(ex.msg, ex.code)
 
-        return not bool(self.errors)
-
     def _check_sections(self, report):
         '''Проверка целостности отчёта'''
         report_sections = set(section.code for section in report.iter())
@@ -58,6 +55,7 @@ class FormatValidator(AbstractValidator):
             for row in rows:
                 if not row.get_column(col_code):
                     raise EmptyColumnError(sec_code, row_code, col_code)
+            yield
 
     def _check_format(self, report):
         '''Проверка формата строк и значений в них'''
@@ -65,36 +63,35 @@ class FormatValidator(AbstractValidator):
             for row in section.iter():
                 self.__check_row(section.code, row.code, row)
                 self.__check_cells(section.code, row.code, row)
+                yield
 
     def __check_row(self, sec_code, row_code, row):
-        '''Итерация по ожидаемым спецификам с их последующей проверкой'''
-        specs_map = self.__get_specs(sec_code)
-        for col_code, spec_idx in specs_map.items():
-            self.__check_format((sec_code, row_code, col_code),
-                                SpecInspector, row, spec_idx, specs_map)
+        '''Проверка специфик строки по заранее подготовленным правилам'''
+        for col_code, spec_idx, inspector in self.__get_specs(sec_code,
+                                                              row_code):
+            if inspector is None:
+                raise NoRuleError(sec_code, row_code, col_code)
+            inspector.check((sec_code, row_code, col_code), row, spec_idx)
 
     def __check_cells(self, sec_code, row_code, row):
         '''Итерация по значениям строки с их последующей проверкой'''
+        rules = self.__get_values(sec_code)
         for column in row.iter():
-            self.__check_format((sec_code, row_code, column.code),
-                                ValueInspector, column.value)
-
-    def __check_format(self, coords, inspector_class, *args):
-        '''Инициализация инспектора, проверка'''
-        inspector = inspector_class(self.__get_format(*coords),
-                                    self._schema.catalogs)
-        inspector.check(coords, *args)
+            inspector = rules.get(row_code, column.code)
+            if inspector is None:
+                raise NoRuleError(sec_code, row_code, column.code)
+            inspector.check((sec_code, row_code, column.code), column.value)
 
-    def __get_format(self, sec_code, row_code, col_code):
-        '''Возвращает словарь с условиями проверки'''
+    def __get_values(self, sec_code):
+        '''Возвращает правила проверки значений раздела'''
         try:
-            return self._schema.formats[sec_code][row_code][col_code]
+            return self._schema.value_rules[sec_code]
         except KeyError:
-            raise NoRuleError(sec_code, row_code, col_code)
+            raise NoSectionTemplateError(sec_code)
 
-    def __get_specs(self, sec_code):
-        '''Возвращает словарь со спецификами'''
+    def __get_specs(self, sec_code, row_code):
+        '''Возвращает правила проверки специфик строки'''
         try:
-            return self._schema.formats[sec_code]['specs']
+            return self._schema.spec_rules[sec_code].get(row_code)
         except KeyError:
             raise NoSectionTemplateError(sec_code)
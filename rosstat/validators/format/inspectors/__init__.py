@@ -1,2 +1,2 @@
-from .spec import SpecInspector
-from .value import ValueInspector
+from .spec import SpecInspector, SpecRules
+from .value import ValueInspector, ValueRules
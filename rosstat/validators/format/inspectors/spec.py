@@ -1,49 +1,120 @@
+from ....helpers import EMPTY_CATALOG, BoundedMemo
 from ..exceptions import SpecBaseError, SpecNotInDictError, SpecValueError
 
+SPEC_MEMO_SIZE = 65536
 
-class SpecInspector:
-    def __init__(self, params, catalogs):
-        self._catalogs = catalogs
 
+class SpecInspector:
+    '''Правило проверки специфики. Справочники и параметры связи
+       с главной спецификой определяются один раз при загрузке схемы.
+       Справочники не изменяются, поэтому результат проверки запоминается
+       для каждого сочетания значений специфик
+    '''
+    def __init__(self, params, catalogs, specs_map):
         self.catalog = params.get('dic')
         self.vld_type = params.get('vldType')
         self.vld_param = params.get('vld')
 
+        self._main_catalog = catalogs.get(self.catalog)
+        self._additional_catalog = None
+        self._link_attr = self._link_key = None
+        self._memo = BoundedMemo(SPEC_MEMO_SIZE)
+
+        if self.vld_type == '4':
+            self._main_catalog = self._main_catalog or EMPTY_CATALOG
+            self._additional_catalog = catalogs.get(self.vld_param,
+                                                    EMPTY_CATALOG)
+        elif self.vld_type == '5':
+            self.__init_link(specs_map)
+
     def __repr__(self):
         return ('<SpecInspector vld_type={vld_type} '
                 'vld_param={vld_param}>').format(**self.__dict__)
 
-    def check(self, coords, row, spec_idx, specs_map):
+    def __init_link(self, specs_map):
+        '''Разбор параметра связи вида "справочник=#раздел,строка,графа"'''
+        attr, sep, coords = (self.vld_param or '').partition('=#')
+        if sep:
+            *_, col_code = coords.split(',')
+            self._link_attr = attr
+            self._link_key = specs_map.get(col_code)
+
+    def check(self, coords, row, spec_idx):
         try:
-            self._check(row, spec_idx, specs_map)
+            self._check(row, spec_idx)
         except SpecBaseError as ex:
             ex.update(coords, spec_idx)
             raise
 
-    def _check(self, row, spec_idx, specs_map):
+    def _check(self, row, spec_idx):
         if self.vld_type == '4':
-            self.__check_value_catalog_add(row, spec_idx)
+            key = row.get_spec(spec_idx)
+            check = self.__check_value_catalog_add
         elif self.vld_type == '5':
-            self.__check_value_catalog_coord(row, spec_idx, specs_map)
+            key = (row.get_spec(spec_idx),
+                   self._link_key and row.get_spec(self._link_key))
+            check = self.__check_value_catalog_coord
+        else:
+            return
+
+        try:
+            error = self._memo[key]
+        except KeyError:
+            error = self._memo[key] = check(key)
+        if error is not None:
+            raise error()
 
-    def __check_value_catalog_add(self, row, spec_idx):
+    def __check_value_catalog_add(self, spec):
         '''Проверка на вхождение в пересечение справочников'''
-        main_catalog = set(self._catalogs[self.catalog]['ids'])
-        additional_catalog = set(self._catalogs[self.vld_param]['ids'])
-        if row.get_spec(spec_idx) not in additional_catalog & main_catalog:
-            raise SpecNotInDictError()
+        if (spec not in self._main_catalog
+                or spec not in self._additional_catalog):
+            return SpecNotInDictError
 
-    def __check_value_catalog_coord(self, row, spec_idx, specs_map):
+    def __check_value_catalog_coord(self, specs):
         '''Проверка на вхождение в справочник и связь с главной спецификой'''
-        catalog, coords = self.vld_param.split('=#')
-        *_, col_code = coords.split(',')
+        if self._main_catalog is None or self._link_key is None:
+            return SpecValueError
 
-        spec = row.get_spec(spec_idx)
-        ctx_spec = row.get_spec(specs_map[col_code])
+        spec, ctx_spec = specs
+        if not self._main_catalog.has(spec, self._link_attr, ctx_spec):
+            return SpecValueError
 
-        try:
-            ctx_catalog = self._catalogs[self.catalog]['full'][spec][catalog]
-            if ctx_spec not in ctx_catalog:
-                raise SpecValueError()
-        except KeyError:
-            raise SpecValueError()
+
+class SpecRules:
+    '''Правила проверки специфик строк раздела. Для каждой строки хранится
+       кортеж (код графы, ключ специфики, правило). Правило None означает,
+       что в шаблоне нет правила для графы со спецификой. Строки
+       с одинаковыми параметрами графы разделяют одно правило
+    '''
+    def __init__(self, rows, catalogs):
+        specs_map = rows['specs']
+        self._missing = tuple((col_code, spec_idx, None)
+                              for col_code, spec_idx in specs_map.items())
+        self._inspectors = {}
+        self._rows = {}
+        for row_code, cells in rows.items():
+            if row_code != 'specs':
+                self._rows[row_code] = tuple(
+                    self.__compile(cells, col_code, spec_idx,
+                                   catalogs, specs_map)
+                    for col_code, spec_idx in specs_map.items())
+
+    def __repr__(self):
+        return '<SpecRules rows={} inspectors={}>'.format(
+            len(self._rows), len(self._inspectors))
+
+    def __compile(self, cells, col_code, spec_idx, catalogs, specs_map):
+        params = cells.get(col_code)
+        if params is None:
+            return col_code, spec_idx, None
+
+        key = (col_code, tuple(sorted(params.items())))
+        inspector = self._inspectors.get(key)
+        if inspector is None:
+            inspector = self._inspectors[key] = SpecInspector(
+                params, catalogs, specs_map)
+        return col_code, spec_idx, inspector
+
+    def get(self, row_code):
+        '''Правила для строки с указанным кодом'''
+        return self._rows.get(row_code, self._missing)
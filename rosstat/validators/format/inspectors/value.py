@@ -1,9 +1,15 @@
+from ....helpers import BoundedMemo
 from ..exceptions import (ValueBaseError, ValueNotNumberError, ValueBadFormat,
                           ValueNotInRangeError, ValueNotInListError,
                           ValueNotInDictError, ValueLengthError)
 
+VALUE_MEMO_SIZE = 16384
+
 
 class ValueInspector:
+    '''Правило проверки значения ячейки. Результат проверки (класс ошибки
+       или None) запоминается для каждого значения
+    '''
     def __init__(self, params, catalogs):
         self._catalogs = catalogs
 
@@ -14,6 +20,7 @@ class ValueInspector:
         self.default = params.get('default')
 
         self.format_funcs_map = {'N': self._is_num, 'C': self._is_chars}
+        self._memo = BoundedMemo(VALUE_MEMO_SIZE)
 
     def __repr__(self):
         return ('<ValueInspector format={format} vld_type={vld_type} '
@@ -42,12 +49,24 @@ class ValueInspector:
             raise ValueLengthError()
 
     def check(self, coords, value):
+        value = value or self.default
         try:
-            self.__check_format(value or self.default)
-            self.__check_value(value or self.default)
-        except ValueBaseError as ex:
+            error = self._memo[value]
+        except KeyError:
+            error = self._memo[value] = self.__find_error(value)
+
+        if error is not None:
+            ex = error()
             ex.update(coords)
-            raise
+            raise ex
+
+    def __find_error(self, value):
+        '''Проверка значения. Возвращает класс ошибки, либо None'''
+        try:
+            self.__check_format(value)
+            self.__check_value(value)
+        except ValueBaseError as ex:
+            return type(ex)
 
     def __check_format(self, value):
         '''Разбор "формулы" проверки формата. Вызов метода проверки'''
@@ -65,7 +84,7 @@ class ValueInspector:
 
     def __check_value_catalog(self, value):
         '''Проверка на вхождение в справочник'''
-        if value not in self._catalogs[self.catalog]['ids']:
+        if value not in self._catalogs[self.catalog]:
             raise ValueNotInDictError()
 
     def __check_value_range(self, value):
@@ -79,3 +98,34 @@ class ValueInspector:
         '''Проверка на вхождение в список'''
         if value not in self.vld_param.split(','):
             raise ValueNotInListError()
+
+
+class ValueRules:
+    '''Правила проверки значений ячеек раздела по строкам и графам.
+       Ячейки с одинаковыми параметрами разделяют одно правило
+    '''
+    def __init__(self, rows, catalogs, inspectors):
+        self._rows = {}
+        for row_code, cells in rows.items():
+            if row_code != 'specs':
+                self._rows[row_code] = {
+                    col_code: self.__compile(params, catalogs, inspectors)
+                    for col_code, params in cells.items()}
+
+    def __repr__(self):
+        return '<ValueRules rows={}>'.format(len(self._rows))
+
+    @staticmethod
+    def __compile(params, catalogs, inspectors):
+        key = tuple(sorted(params.items()))
+        inspector = inspectors.get(key)
+        if inspector is None:
+            inspector = inspectors[key] = ValueInspector(params, catalogs)
+        return inspector
+
+    def get(self, row_code, col_code):
+        '''Правило для ячейки, либо None если его нет в шаблоне'''
+        try:
+            return self._rows[row_code][col_code]
+        except KeyError:
+            return None
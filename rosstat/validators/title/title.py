@@ -22,12 +22,10 @@ class TitleValidator(AbstractValidator):
         title_items = self._schema.title.findall('./item')
         return {item.get('field'): item.get('name') for item in title_items}
 
-    def validate(self, report):
-        self._check_common(report)
-        self._check_required_fields()
-        self._check_missing_fields()
-
-        return not bool(self.errors)
+    def _iter_checks(self, report):
+        yield from self._check_common(report)
+        yield self._check_required_fields()
+        yield self._check_missing_fields()
 
     def _check_common(self, report):
         '''Выполенние цикла опервичных проверок'''
@@ -38,6 +36,7 @@ class TitleValidator(AbstractValidator):
             self.__check_okpo(field, value)
 
             self._report_fields.append(field)
+            yield
 
     def __format_field(self, field):
         '''Возвращает отформатированные название и идентификатор поля'''
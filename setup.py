@@ -1,8 +1,34 @@
+import re
+import sys
+import subprocess
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
+
+with open('rosstat/__init__.py', 'r') as init:
+    version = re.search(r"__version__ = '(.+)'", init.read()).group(1)
+
+
+class BuildPyCommand(build_py):
+    '''Сборка с генерацией таблиц разбора формул (parsetab.py)'''
+    def run(self):
+        super().run()
+        if self.dry_run:
+            return
+
+        outputdir = self.get_package_dir('rosstat.validators.control.parser')
+        code = ('from rosstat.validators.control.parser.parser import '
+                f'write_tables; write_tables({outputdir!r})')
+        result = subprocess.run([sys.executable, '-c', code],
+                                cwd=self.build_lib)
+        if result.returncode != 0:
+            self.warn('parse tables were not regenerated, '
+                      'the bundled parsetab.py is used')
+
 
 setup(
     name='rosstat-flc',
-    version='1.3.1',
+    cmdclass={'build_py': BuildPyCommand},
+    version=version,
     packages=find_packages(),
     description='Tool for format-logistic control of reports sent to RosStat',
     long_description=open('README.md', 'r').read(),
@@ -13,6 +39,7 @@ setup(
     license_file='LICENSE',
     url='https://github.com/WoolenSweater/rosstat_flc',
     install_requires=['lxml', 'ply'],
+    extras_require={'numpy': ['numpy']},
     python_requires='>=3.7',
     classifiers=[
         'Intended Audience :: Developers',